@@ -1,7 +1,7 @@
 # import the libraries
 import streamlit as st
 import hashlib
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 import sys
 print(sys.executable)
@@ -11,8 +11,8 @@ print(sys.executable)
 from wofofiles.globfuncs import get_app_title
 # import the menu
 from wofofiles.menu import app_menu
-# import the database connection
-from wofofiles.conn import username, password, host, port, database
+# import the shared database engine
+from wofofiles.engine import get_engine
 
 # page config
 st.set_page_config(
@@ -23,12 +23,9 @@ st.set_page_config(
 
 
 
-# Create a connection string for the MySQL database
-connection_string = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-
-# Create the SQLAlchemy engine to interact with the database
+# Get the shared SQLAlchemy engine to interact with the database
 try:
-    engine = create_engine(connection_string, echo=True)
+    engine = get_engine()
 except SQLAlchemyError as e:
     st.error(f"Failed to connect to the database: {e}")
 
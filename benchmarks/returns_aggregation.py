@@ -0,0 +1,76 @@
+# Benchmark of the returns report aggregation
+# compares the old per-group apply (two passes per dimension) with wofofiles.aggregate.grouping_sets
+# run from the repository root: python -m benchmarks.returns_aggregation [rows]
+
+# Python libraries
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Local imports
+from wofofiles.aggregate import grouping_sets
+
+dimensions = ['CustomerName', 'UserName', 'GroupName', 'ItemNameEn']
+
+
+# Function to build a synthetic transaction frame with the compact schema
+def make_transactions(rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def names(count, prefix):
+        return pd.Categorical.from_codes(rng.integers(0, count, rows), [f"{prefix} {i}" for i in range(count)])
+
+    return pd.DataFrame({
+        'StoreName': names(20, 'Store'),
+        'TransactionDate': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+        'CustomerName': names(5000, 'Customer'),
+        'UserName': names(200, 'User'),
+        'GroupName': names(50, 'Group'),
+        'ItemNameEn': names(20000, 'Item'),
+        'SalesPrice': (rng.random(rows) * 100).astype('float32'),
+        'DiscountValue': rng.random(rows).astype('float32'),
+        'SalesQuantity': rng.integers(1, 5, rows).astype('float32'),
+        'ReturnQuantity': rng.integers(0, 2, rows).astype('int8'),
+    })
+
+# The previous calculate_return_rate: two groupby().apply() per dimension
+def legacy(df):
+    result = {}
+    for dimension in dimensions:
+        group_by = df.groupby(dimension, observed=True)
+        sales_value = group_by.apply(lambda x: ((x['SalesPrice'] - x['DiscountValue']) * x['SalesQuantity']).sum())
+        return_value = group_by.apply(lambda x: ((x['SalesPrice'] - x['DiscountValue']) * x['ReturnQuantity']).sum())
+        result[dimension] = (sales_value, return_value)
+    return result
+
+def vectorized(df):
+    return grouping_sets(df, {dimension: [dimension] for dimension in dimensions})
+
+def best_of(func, df, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for rows in sizes:
+        df = make_transactions(rows)
+        legacy_time, legacy_result = best_of(legacy, df, repeat=1)
+        vectorized_time, vectorized_result = best_of(vectorized, df)
+
+        # both must give the same sums
+        for dimension in dimensions:
+            sales_value, return_value = legacy_result[dimension]
+            summary = vectorized_result[dimension]
+            np.testing.assert_allclose(summary['SalesValue'].to_numpy(), sales_value.to_numpy(), rtol=1e-4)
+            np.testing.assert_allclose(summary['ReturnValue'].to_numpy(), return_value.to_numpy(), rtol=1e-4)
+
+        print(f"{rows:>10} {legacy_time:>12.3f} {vectorized_time:>15.3f} {legacy_time / vectorized_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 # Python libraries
 import streamlit as st
-import pandas as pd
-import os
+import math
+import time
 import hashlib
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 # Local imports
@@ -11,9 +11,20 @@ from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from wofofiles.globfuncs import get_app_title
 # import the menu
 from wofofiles.menu import app_menu
-# import the database connection
-from wofofiles.conn import username, password, host, port, database
-import pandas as pd
+# import the shared database engine
+from wofofiles.engine import get_engine
+# import the permission snapshots (writes here invalidate them)
+from wofofiles.permissions import get_permissions, permissions_write
+# import the batched save helpers
+from wofofiles.admin import changed_rows, update_rows, delete_rows
+# import the paged admin listings and cached dropdown options
+from wofofiles.admin import admin_tables, count_rows, fetch_page, get_options, user_display
+# import the connection pool metrics
+from wofofiles.engine import pool_metrics
+# import the background refresh status
+from wofofiles.prewarm import prewarm_status
+# import the on-disk cache counters
+from wofofiles.cache import disk_cache_stats
 
 # Page config
 st.set_page_config(
@@ -22,14 +33,38 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Create a connection string for the MySQL database
-connection_string = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-engine = create_engine(connection_string, echo=True)
+# Get the shared SQLAlchemy engine to interact with the database
+engine = get_engine()
 
 # Hashing the password
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
+# Rows per page offered in the admin tables
+page_sizes = (25, 50, 100, 200)
+
+# Search, sort and page controls of an admin table, only the selected page is fetched
+# returns the page and a data editor key for this view (pending edits do not carry over to another page)
+def paged_table(table, connection):
+    columns = list(admin_tables[table]['columns'])
+    search_col, sort_col, order_col = st.columns([3, 2, 1])
+    search = search_col.text_input("Search 🔍", key=f"{table}_search").strip()
+    sort = sort_col.selectbox("Sort by", columns, key=f"{table}_sort")
+    descending = order_col.toggle("Desc", key=f"{table}_desc")
+
+    total = count_rows(table, search, connection)
+    size_col, page_col, info_col = st.columns([1, 1, 2])
+    page_size = size_col.selectbox("Rows", page_sizes, key=f"{table}_size")
+    pages = max(1, math.ceil(total / page_size))
+    # back to the last page when the search leaves fewer pages
+    if st.session_state.get(f"{table}_page", 1) > pages:
+        st.session_state[f"{table}_page"] = pages
+    page = page_col.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{table}_page")
+    info_col.caption(f"{total} rows, page {page} of {pages}")
+
+    df = fetch_page(table, search, sort, descending, page, page_size, connection)
+    return df, f"editable_{table}_{hash((search, sort, descending, page, page_size))}"
+
 # Users CRUD
 def users_page():
 
@@ -43,7 +78,7 @@ def users_page():
             if user_code and user_name and password:
                 hashed_password = hash_password(password)
                 try:
-                    with engine.begin() as connection:
+                    with permissions_write() as connection:
                         insert_query = text("INSERT INTO users (UserCode, UserName, Password) VALUES (:user_code, :user_name, :password)")
                         connection.execute(insert_query, {'user_code': user_code, 'user_name': user_name, 'password': hashed_password})
                         st.success(f"User '{user_name}' added successfully!")
@@ -57,10 +92,9 @@ def users_page():
     # View existing users as a table
     try:
         with engine.connect() as connection:
-            result = connection.execute(text("SELECT UserCode, UserName FROM users"))
-            users = result.fetchall()
-            if users:
-                df = pd.DataFrame(users, columns=["User Code", "User Name"])
+            # only the requested page is fetched, searched and sorted in the database
+            df, editor_key = paged_table('users', connection)
+            if not df.empty:
 
                 # Adding 'Delete' and 'Change Password' columns
                 df["Delete"] = False  # Default 'Select' column with False value
@@ -76,44 +110,32 @@ def users_page():
                         "Change Password": st.column_config.CheckboxColumn("Change Password"),
                     },
                     hide_index=True,
-                    key="editable_users",
+                    key=editor_key,
                     use_container_width=True
                 )
 
                 # Handle edits
                 if st.button("Update ↻"):
-                    for idx, row in edited_df.iterrows():
-                        original = df.iloc[idx]
-                        if row["User Code"] != original["User Code"] or row["User Name"] != original["User Name"]:
-                            try:
-                                update_query = text(""" 
-                                    UPDATE users 
-                                    SET UserCode = :new_user_code, UserName = :new_user_name 
-                                    WHERE UserCode = :original_user_code
-                                """)
-                                params = {
-                                    'new_user_code': row["User Code"],
-                                    'new_user_name': row["User Name"],
-                                    'original_user_code': original["User Code"]
-                                }
-                                with engine.begin() as connection:
-                                    connection.execute(update_query, params)
-                                st.success(f"User '{original['User Code']}' updated successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to update user: {str(e.__dict__['orig'])}")
+                    # all changed rows are saved in one statement
+                    original, edited = changed_rows(df, edited_df, ["User Code", "User Name"])
+                    try:
+                        count = update_rows('users', {
+                            'UserCode': edited["User Code"],
+                            'UserName': edited["User Name"],
+                        }, keys={'UserCode': original["User Code"]})
+                        st.success(f"{count} user(s) updated successfully!")
+                    except SQLAlchemyError as e:
+                        st.error(f"Failed to update users: {str(e.__dict__['orig'])}")
 
                 # Handle deletion
                 rows_to_delete = edited_df[edited_df["Delete"] == True]
                 if not rows_to_delete.empty:
                     if st.button("Delete ✖"):
-                        for _, row in rows_to_delete.iterrows():
-                            try:
-                                with engine.begin() as connection:
-                                    delete_query = text("DELETE FROM users WHERE UserCode = :user_code")
-                                    connection.execute(delete_query, {'user_code': row["User Code"]})
-                                st.success(f"User '{row['User Code']}' deleted successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to delete user: {str(e.__dict__['orig'])}")
+                        try:
+                            count = delete_rows('users', {'UserCode': rows_to_delete["User Code"]})
+                            st.success(f"{count} user(s) deleted successfully!")
+                        except SQLAlchemyError as e:
+                            st.error(f"Failed to delete users: {str(e.__dict__['orig'])}")
 
                 # Handle password change
                 rows_to_change_password = edited_df[edited_df["Change Password"] == True]
@@ -124,7 +146,7 @@ def users_page():
                             if new_password:
                                 hashed_new_password = hash_password(new_password)
                                 try:
-                                    with engine.begin() as connection:
+                                    with permissions_write() as connection:
                                         update_password_query = text("""
                                             UPDATE users
                                             SET Password = :new_password
@@ -153,7 +175,7 @@ def groups_page():
         if st.button("Add"):
             if group_code and group_name:
                 try:
-                    with engine.begin() as connection:
+                    with permissions_write() as connection:
                         insert_query = text("INSERT INTO `groups` (GroupCode, GroupName) VALUES (:group_code, :group_name)")
                         connection.execute(insert_query, {'group_code': group_code, 'group_name': group_name})
                         st.success(f"Group '{group_name}' added successfully!")
@@ -167,10 +189,9 @@ def groups_page():
     # View existing groups as a table
     try:
         with engine.connect() as connection:
-            result = connection.execute(text("SELECT GroupCode, GroupName FROM `groups`"))
-            groups = result.fetchall()
-            if groups:
-                df = pd.DataFrame(groups, columns=["Group Code", "Group Name"])
+            # only the requested page is fetched, searched and sorted in the database
+            df, editor_key = paged_table('groups', connection)
+            if not df.empty:
 
                 # Adding 'Delete' column
                 df["Delete"] = False  # Default 'Select' column with False value
@@ -184,44 +205,32 @@ def groups_page():
                         "Group Name": st.column_config.TextColumn("Group Name"),
                     },
                     hide_index=True,
-                    key="editable_groups",
+                    key=editor_key,
                     use_container_width=True
                 )
 
                 # Handle edits
                 if st.button("Update ↻"):
-                    for idx, row in edited_df.iterrows():
-                        original = df.iloc[idx]
-                        if row["Group Code"] != original["Group Code"] or row["Group Name"] != original["Group Name"]:
-                            try:
-                                update_query = text(""" 
-                                    UPDATE `groups` 
-                                    SET GroupCode = :new_group_code, GroupName = :new_group_name 
-                                    WHERE GroupCode = :original_group_code
-                                """)
-                                params = {
-                                    'new_group_code': row["Group Code"],
-                                    'new_group_name': row["Group Name"],
-                                    'original_group_code': original["Group Code"]
-                                }
-                                with engine.begin() as connection:
-                                    connection.execute(update_query, params)
-                                st.success(f"Group '{original['Group Code']}' updated successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to update group: {str(e.__dict__['orig'])}")
+                    # all changed rows are saved in one statement
+                    original, edited = changed_rows(df, edited_df, ["Group Code", "Group Name"])
+                    try:
+                        count = update_rows('`groups`', {
+                            'GroupCode': edited["Group Code"],
+                            'GroupName': edited["Group Name"],
+                        }, keys={'GroupCode': original["Group Code"]})
+                        st.success(f"{count} group(s) updated successfully!")
+                    except SQLAlchemyError as e:
+                        st.error(f"Failed to update groups: {str(e.__dict__['orig'])}")
 
                 # Handle deletion
                 rows_to_delete = edited_df[edited_df["Delete"] == True]
                 if not rows_to_delete.empty:
                     if st.button("Delete ✖"):
-                        for _, row in rows_to_delete.iterrows():
-                            try:
-                                with engine.begin() as connection:
-                                    delete_query = text("DELETE FROM `groups` WHERE GroupCode = :group_code")
-                                    connection.execute(delete_query, {'group_code': row["Group Code"]})
-                                st.success(f"Group '{row['Group Code']}' deleted successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to delete group: {str(e.__dict__['orig'])}")
+                        try:
+                            count = delete_rows('`groups`', {'GroupCode': rows_to_delete["Group Code"]})
+                            st.success(f"{count} group(s) deleted successfully!")
+                        except SQLAlchemyError as e:
+                            st.error(f"Failed to delete groups: {str(e.__dict__['orig'])}")
 
             else:
                 st.write("No groups found.")
@@ -239,7 +248,7 @@ def sections_page():
         if st.button("Add"):
             if section_code and section_name:
                 try:
-                    with engine.begin() as connection:
+                    with permissions_write() as connection:
                         insert_query = text("INSERT INTO sections (SectionCode, SectionName) VALUES (:section_code, :section_name)")
                         connection.execute(insert_query, {'section_code': section_code, 'section_name': section_name})
                         st.success(f"Section '{section_name}' added successfully!")
@@ -253,10 +262,9 @@ def sections_page():
     # View existing sections as a table
     try:
         with engine.connect() as connection:
-            result = connection.execute(text("SELECT SectionCode, SectionName FROM sections"))
-            sections = result.fetchall()
-            if sections:
-                df = pd.DataFrame(sections, columns=["Section Code", "Section Name"])
+            # only the requested page is fetched, searched and sorted in the database
+            df, editor_key = paged_table('sections', connection)
+            if not df.empty:
 
                 # Adding 'Delete' column
                 df["Delete"] = False  # Default 'Select' column with False value
@@ -270,44 +278,32 @@ def sections_page():
                         "Section Name": st.column_config.TextColumn("Section Name"),
                     },
                     hide_index=True,
-                    key="editable_sections",
+                    key=editor_key,
                     use_container_width=True
                 )
 
                 # Handle edits
                 if st.button("Update ↻"):
-                    for idx, row in edited_df.iterrows():
-                        original = df.iloc[idx]
-                        if row["Section Code"] != original["Section Code"] or row["Section Name"] != original["Section Name"]:
-                            try:
-                                update_query = text(""" 
-                                    UPDATE sections 
-                                    SET SectionCode = :new_section_code, SectionName = :new_section_name 
-                                    WHERE SectionCode = :original_section_code
-                                """)
-                                params = {
-                                    'new_section_code': row["Section Code"],
-                                    'new_section_name': row["Section Name"],
-                                    'original_section_code': original["Section Code"]
-                                }
-                                with engine.begin() as connection:
-                                    connection.execute(update_query, params)
-                                st.success(f"Section '{original['Section Code']}' updated successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to update section: {str(e.__dict__['orig'])}")
+                    # all changed rows are saved in one statement
+                    original, edited = changed_rows(df, edited_df, ["Section Code", "Section Name"])
+                    try:
+                        count = update_rows('sections', {
+                            'SectionCode': edited["Section Code"],
+                            'SectionName': edited["Section Name"],
+                        }, keys={'SectionCode': original["Section Code"]})
+                        st.success(f"{count} section(s) updated successfully!")
+                    except SQLAlchemyError as e:
+                        st.error(f"Failed to update sections: {str(e.__dict__['orig'])}")
 
                 # Handle deletion
                 rows_to_delete = edited_df[edited_df["Delete"] == True]
                 if not rows_to_delete.empty:
                     if st.button("Delete ✖"):
-                        for _, row in rows_to_delete.iterrows():
-                            try:
-                                with engine.begin() as connection:
-                                    delete_query = text("DELETE FROM sections WHERE SectionCode = :section_code")
-                                    connection.execute(delete_query, {'section_code': row["Section Code"]})
-                                st.success(f"Section '{row['Section Code']}' deleted successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to delete section: {str(e.__dict__['orig'])}")
+                        try:
+                            count = delete_rows('sections', {'SectionCode': rows_to_delete["Section Code"]})
+                            st.success(f"{count} section(s) deleted successfully!")
+                        except SQLAlchemyError as e:
+                            st.error(f"Failed to delete sections: {str(e.__dict__['orig'])}")
 
             else:
                 st.write("No sections found.")
@@ -326,7 +322,7 @@ def pages_page():
         if st.button("Add"):
             if page_ref and page_name:
                 try:
-                    with engine.begin() as connection:
+                    with permissions_write() as connection:
                         insert_query = text("INSERT INTO pages (PageRef, PageName) VALUES (:page_ref, :page_name)")
                         connection.execute(insert_query, {'page_ref': page_ref, 'page_name': page_name})
                         st.success(f"Page '{page_name}' added successfully!")
@@ -341,10 +337,9 @@ def pages_page():
 
     try:
         with engine.connect() as connection:
-            result = connection.execute(text("SELECT PageRef, PageName FROM pages"))
-            pages = result.fetchall()
-            if pages:
-                df = pd.DataFrame(pages, columns=["Page Reference", "Page Name"])
+            # only the requested page is fetched, searched and sorted in the database
+            df, editor_key = paged_table('pages', connection)
+            if not df.empty:
 
                 # Adding a 'Select' column for row selection
                 df["Delete"] = False  # Default 'Select' column with False value
@@ -358,43 +353,32 @@ def pages_page():
                         "Page Name": st.column_config.TextColumn("Page Name"),
                     },
                     hide_index=True,
-                    key="editable_pages",
+                    key=editor_key,
                     use_container_width=True
                 )
 
                 # Handle edits
                 if st.button("Update ↻"):
-                    for idx, row in edited_df.iterrows():
-                        original = df.iloc[idx]
-                        if row["Page Reference"] != original["Page Reference"] or row["Page Name"] != original["Page Name"]:
-                            try:
-                                with engine.begin() as connection:
-                                    update_query = text("""
-                                        UPDATE pages 
-                                        SET PageRef = :new_page_ref, PageName = :new_page_name 
-                                        WHERE PageRef = :original_page_ref
-                                    """)
-                                    connection.execute(update_query, {
-                                        'new_page_ref': row["Page Reference"],
-                                        'new_page_name': row["Page Name"],
-                                        'original_page_ref': original["Page Reference"]
-                                    })
-                                st.success(f"Page '{original['Page Reference']}' updated successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to update page: {str(e.__dict__['orig'])}")
+                    # all changed rows are saved in one statement
+                    original, edited = changed_rows(df, edited_df, ["Page Reference", "Page Name"])
+                    try:
+                        count = update_rows('pages', {
+                            'PageRef': edited["Page Reference"],
+                            'PageName': edited["Page Name"],
+                        }, keys={'PageRef': original["Page Reference"]})
+                        st.success(f"{count} page(s) updated successfully!")
+                    except SQLAlchemyError as e:
+                        st.error(f"Failed to update pages: {str(e.__dict__['orig'])}")
 
                 # Handle deletion
                 rows_to_delete = edited_df[edited_df["Delete"] == True]
                 if not rows_to_delete.empty:
                     if st.button("Delete ✖"):
-                        for _, row in rows_to_delete.iterrows():
-                            try:
-                                with engine.begin() as connection:
-                                    delete_query = text("DELETE FROM pages WHERE PageRef = :page_ref")
-                                    connection.execute(delete_query, {'page_ref': row["Page Reference"]})
-                                st.success(f"Page '{row['Page Reference']}' deleted successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to delete page: {str(e.__dict__['orig'])}")
+                        try:
+                            count = delete_rows('pages', {'PageRef': rows_to_delete["Page Reference"]})
+                            st.success(f"{count} page(s) deleted successfully!")
+                        except SQLAlchemyError as e:
+                            st.error(f"Failed to delete pages: {str(e.__dict__['orig'])}")
             else:
                 st.write("No pages found.")
     except SQLAlchemyError as e:
@@ -402,20 +386,13 @@ def pages_page():
 
 # Creating CRUD for the users access control
 def access_control_page():
-    # Load all options for dropdowns
+    # Load all options for dropdowns (cached until the next admin change)
     try:
-        with engine.connect() as connection:
-            users = connection.execute(text("SELECT UserCode, UserName FROM users")).fetchall()
-            groups = connection.execute(text("SELECT GroupCode, GroupName FROM `groups`")).fetchall()
-            sections = connection.execute(text("SELECT SectionCode, SectionName FROM sections")).fetchall()
-            pages = connection.execute(text("SELECT PageRef, PageName FROM pages")).fetchall()
-
-            # Create dictionaries for dropdowns
-            user_options = {f"{user.UserName} ({user.UserCode})": user.UserCode for user in users}
-            group_options = {"None": None} | {group.GroupName: group.GroupCode for group in groups}
-            section_options = {"None": None} | {section.SectionName: section.SectionCode for section in sections}
-            page_options = {page.PageName: page.PageRef for page in pages}
-
+        options = get_options()
+        user_options = options['users']
+        group_options = options['groups']
+        section_options = options['sections']
+        page_options = options['pages']
     except SQLAlchemyError as e:
         st.error(f"Failed to load options: {str(e.__dict__['orig'])}")
         return
@@ -430,7 +407,7 @@ def access_control_page():
         if st.button("Add"):
             if selected_user and selected_page:
                 try:
-                    with engine.begin() as connection:
+                    with permissions_write() as connection:
                         insert_query = text("""
                             INSERT INTO access_control (UserCode, GroupCode, SectionCode, PageRef) 
                             VALUES (:user_code, :group_code, :section_code, :page_ref)
@@ -452,24 +429,15 @@ def access_control_page():
     # View existing access control entries as a table
     try:
         with engine.connect() as connection:
-            query = text("""
-                SELECT ac.UserCode, u.UserName, ac.GroupCode, g.GroupName, 
-                       ac.SectionCode, s.SectionName, ac.PageRef, p.PageName
-                FROM access_control ac
-                JOIN users u ON ac.UserCode = u.UserCode
-                LEFT JOIN `groups` g ON ac.GroupCode = g.GroupCode
-                LEFT JOIN sections s ON ac.SectionCode = s.SectionCode
-                LEFT JOIN pages p ON ac.PageRef = p.PageRef
-            """)
-            entries = connection.execute(query).fetchall()
-            if entries:
-                df = pd.DataFrame(entries, columns=["User Code", "User Name", "Group Code", "Group Name", "Section Code", "Section Name", "Page Ref", "Page Name"])
+            # only the requested page is fetched, searched and sorted in the database
+            df, editor_key = paged_table('access_control', connection)
+            if not df.empty:
 
                 # Adding 'Delete' column
                 df["Delete"] = False  # Default 'Select' column with False value
 
                 # Combine User Name and User Code for display
-                df["User Display"] = df.apply(lambda row: f"{row['User Name']} ({row['User Code']})", axis=1)
+                df["User Display"] = user_display(df["User Name"], df["User Code"])
 
                 # Editable data table with dropdowns
                 edited_df = st.data_editor(
@@ -482,61 +450,96 @@ def access_control_page():
                         "Page Name": st.column_config.SelectboxColumn("Page Name", options=list(page_options.keys())),
                     },
                     hide_index=True,
-                    key="editable_access_control",
+                    key=editor_key,
                     use_container_width=True
                 )
 
                 # Handle edits
                 if st.button("Update ↻"):
-                    for idx, row in edited_df.iterrows():
-                        original = df.iloc[idx]
-                        if (row["User Display"] != original["User Display"] or row["Group Name"] != original["Group Name"] or
-                            row["Section Name"] != original["Section Name"] or row["Page Name"] != original["Page Name"]):
-                            try:
-                                update_query = text("""
-                                    UPDATE access_control 
-                                    SET UserCode = :new_user_code, GroupCode = :new_group_code, 
-                                        SectionCode = :new_section_code, PageRef = :new_page_ref 
-                                    WHERE UserCode = :original_user_code AND PageRef = :original_page_ref
-                                """)
-                                params = {
-                                    'new_user_code': user_options[row["User Display"]],
-                                    'new_group_code': group_options[row["Group Name"]],
-                                    'new_section_code': section_options[row["Section Name"]],
-                                    'new_page_ref': page_options[row["Page Name"]],
-                                    'original_user_code': original["User Code"],
-                                    'original_page_ref': original["Page Ref"]
-                                }
-                                with engine.begin() as connection:
-                                    connection.execute(update_query, params)
-                                st.success(f"Access control entry for User '{original['User Name']}' updated successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to update access control entry: {str(e.__dict__['orig'])}")
+                    # all changed rows are saved in one statement
+                    original, edited = changed_rows(df, edited_df, ["User Display", "Group Name", "Section Name", "Page Name"])
+                    try:
+                        count = update_rows('access_control', {
+                            'UserCode': edited["User Display"].map(user_options),
+                            'GroupCode': edited["Group Name"].fillna("None").map(group_options),
+                            'SectionCode': edited["Section Name"].fillna("None").map(section_options),
+                            'PageRef': edited["Page Name"].map(page_options),
+                        }, keys={'UserCode': df.loc[original.index, "User Code"], 'PageRef': df.loc[original.index, "Page Ref"]})
+                        st.success(f"{count} access control entry(ies) updated successfully!")
+                    except SQLAlchemyError as e:
+                        st.error(f"Failed to update access control entries: {str(e.__dict__['orig'])}")
 
                 # Handle deletion
                 rows_to_delete = edited_df[edited_df["Delete"] == True]
                 if not rows_to_delete.empty:
                     if st.button("Delete ✖"):
-                        for _, row in rows_to_delete.iterrows():
-                            try:
-                                with engine.begin() as connection:
-                                    delete_query = text("DELETE FROM access_control WHERE UserCode = :user_code AND PageRef = :page_ref")
-                                    connection.execute(delete_query, {'user_code': user_options[row["User Display"]], 'page_ref': page_options[row["Page Name"]]})
-                                st.success(f"Access control entry for User '{row['User Display']}' deleted successfully!")
-                            except SQLAlchemyError as e:
-                                st.error(f"Failed to delete access control entry: {str(e.__dict__['orig'])}")
+                        try:
+                            count = delete_rows('access_control', {
+                                'UserCode': rows_to_delete["User Display"].map(user_options),
+                                'PageRef': rows_to_delete["Page Name"].map(page_options)
+                            })
+                            st.success(f"{count} access control entry(ies) deleted successfully!")
+                        except SQLAlchemyError as e:
+                            st.error(f"Failed to delete access control entries: {str(e.__dict__['orig'])}")
 
             else:
                 st.write("No access control entries found.")
     except SQLAlchemyError as e:
         st.error(f"Failed to retrieve access control entries: {str(e.__dict__['orig'])}")
 
+# Usage of the shared resources of this server process
+def metrics_page():
+    if st.button("Refresh ↻"):
+        st.rerun()
+
+    # Database connection pool (see wofofiles/engine.py)
+    st.subheader("Connection pool")
+    pool = pool_metrics()
+    size_col, out_col, overflow_col, wait_col = st.columns(4)
+    size_col.metric("Pool size", pool['pool_size'])
+    out_col.metric("Checked out", pool['checked_out'], help=f"{pool['checked_in']} idle in the pool")
+    overflow_col.metric("Overflow", pool['overflow'], help=f"{pool['overflow_hits']} checkouts needed an overflow connection")
+    wait_col.metric("Wait avg (ms)", f"{pool['wait_time_avg'] * 1000:.1f}", help=f"max {pool['wait_time_max'] * 1000:.1f} ms")
+    st.caption(f"{pool['checkouts']} checkouts since the server started")
+
+    # Background refresh of the datasets (see wofofiles/prewarm.py)
+    st.subheader("Prewarm")
+    status = prewarm_status()
+    if status:
+        st.dataframe([
+            {
+                'Task': name,
+                'Interval (s)': task['interval'],
+                'Runs': task['runs'],
+                'Failures': task['failures'],
+                'Last run': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(task['last_run'])) if task['last_run'] else "",
+                'Last duration (s)': round(task['last_duration'], 2) if task['last_duration'] is not None else None,
+            }
+            for name, task in status.items()
+        ], hide_index=True, use_container_width=True)
+        for name, task in status.items():
+            if task['last_error']:
+                with st.expander(f"Last error of {name}"):
+                    st.code(task['last_error'])
+    else:
+        st.write("The prewarm scheduler is not running in this process.")
+
+    # Results kept on disk by the persisted caches (see wofofiles/cache.py)
+    st.subheader("Disk cache")
+    disk = disk_cache_stats()
+    lookups = disk['hits'] + disk['misses']
+    items_col, size_col, hits_col, evictions_col = st.columns(4)
+    items_col.metric("Results", disk['items'])
+    size_col.metric("Size (MB)", f"{disk['bytes'] / 1024 ** 2:.1f}", help=f"limit {disk['bytes_limit'] / 1024 ** 2:.0f} MB, {disk['compress']} compressed")
+    hits_col.metric("Hit rate", f"{disk['hits'] / lookups:.0%}" if lookups else "n/a", help=f"{disk['hits']} hits, {disk['misses']} misses")
+    evictions_col.metric("Evictions", disk['evictions'])
+
 # Add the access control page to the MAC page
 def mac_page():
     st.title("Meerkat Access Control")
 
     # Select page to manage
-    page = st.selectbox("**:blue[Select a page ⤵]**", ("", "Manage Users", "Manage Groups", "Manage Sections", "Manage Pages", "Manage Permissions"))
+    page = st.selectbox("**:blue[Select a page ⤵]**", ("", "Manage Users", "Manage Groups", "Manage Sections", "Manage Pages", "Manage Permissions", "System Metrics"))
 
     if page == "Manage Users":
         users_page()
@@ -548,23 +551,16 @@ def mac_page():
         pages_page()       
     if page == "Manage Permissions":
         access_control_page()
+    if page == "System Metrics":
+        metrics_page()
 
 # Display the MAC page if this script is run
 def main():
     # Check if the user is logged in
     if st.session_state.get('logged_in'):
         try:
-            with engine.connect() as connection:
-                user_group_query = text("""
-                    SELECT g.GroupName 
-                    FROM users u
-                    JOIN access_control ac ON u.UserCode = ac.UserCode
-                    JOIN `groups` g ON ac.GroupCode = g.GroupCode
-                    WHERE u.UserCode = :user_code
-                """)
-                result = connection.execute(user_group_query, {'user_code': st.session_state.get('user_code')}).fetchone()
-                user_group = result.GroupName if result else None
-                st.session_state['user_group'] = user_group
+            permissions = get_permissions(st.session_state.get('user_code'))
+            st.session_state['user_group'] = permissions['group']
         except SQLAlchemyError as e:
             st.error(f"Failed to retrieve user group: {str(e.__dict__['orig'])}")
             return
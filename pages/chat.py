@@ -1,52 +1,72 @@
+import json
 import streamlit as st
-import pandas as pd
-import openai
 
 # local imports
-# import the page title
-from wofofiles.globfuncs import get_app_title
 # import the menu
 from wofofiles.menu import app_menu
-# import the database connection
-
-# import the data from the xlsx file from drafts folder
-df = pd.read_excel('draft/data_sample.xlsx')
-# remove the columns that are not needed TRNS_TYPE_CODE, TRNS_SERIAL, INSERT_USER, STORE_CODE, CUSTOMER_CODE, ITEM_GROUP_CODE, ITEM_CODE, ITEM_NAME
-df.drop(['TRNS_TYPE_CODE', 'TRNS_SERIAL', 'INSERT_USER', 'STORE_CODE', 'CUSTOMER_CODE', 'ITEM_GROUP_CODE', 'ITEM_CODE', 'ITEM_NAME'], axis=1, inplace=True)
-# fill null values with "Walk-in" in the column CUSTOMER_NAME
-df['CUSTOMER_NAME'].fillna('Walk-in', inplace=True)
-# fill null values with 0 in the column LIST_RATE
-df['LIST_RATE'].fillna(0, inplace=True) 
-
-# Streamlit App Layout
-st.title("Streamlit App with ChatGPT API Integration")
-
-st.subheader("DataFrame")
-#st.dataframe(df)
-
-# Input Section
-st.subheader("Query ChatGPT")
-query = st.text_area("Enter your query related to the DataFrame or anything else:")
-
-if st.button("Send Query"):
-    if query.strip():
-        with st.spinner("Processing your query..."):
+# import the compact data context sent with the questions (summaries instead of the whole frame)
+from wofofiles.chat_context import build_context, data_version
+# import the chat backends, the response cache and the local query plans
+from wofofiles.llm import openai_backend, response_cache
+from wofofiles.query_plan import PlanError, run_plan, answer_messages
+
+# Chat page, only drawn for logged in users
+def chat_page():
+    # Streamlit App Layout
+    st.title("Streamlit App with ChatGPT API Integration")
+
+    st.subheader("DataFrame")
+    #st.dataframe(df)
+
+    # Input Section
+    st.subheader("Query ChatGPT")
+    query = st.text_area("Enter your query related to the DataFrame or anything else:")
+    # Query plan: the model only sees the schema, writes a plan that runs here on the full data, then answers from its result
+    mode = st.radio("Answer from", ["Data summary", "Query plan"], horizontal=True)
+
+    if st.button("Send Query"):
+        if query.strip():
+            # openai is imported, its client built (once per process) and the data read only now that a query was sent
+            import openai
             try:
-                # Send the query to ChatGPT
-                client = openai.OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-                response = client.chat.completions.create(
-                    model="gpt-4o",  # Specify the model version
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant."},
-                        {"role": "user", "content": f"Here's the data: {df.to_dict()}. {query}"}
-                    ],
-                    max_tokens=150
-                )
-
-                # Extract and display the response
-                chat_response = response.choices[0].message.content.strip()
-                st.success("Response from ChatGPT:")
-                st.write(chat_response)
+                backend = openai_backend(st.secrets["OPENAI_API_KEY"], model="gpt-4o")  # Specify the model version
+
+                # Same question on the same data and model: answer from the cache
+                key = response_cache.key(query, backend.model, data_version(), mode)
+                cached = response_cache.get(key)
+                if cached is not None:
+                    st.success("Response from ChatGPT (cached):")
+                    st.write(cached['answer'])
+                    plan, result = cached['plan'], cached['result']
+                else:
+                    with st.spinner("Processing your query..."):
+                        if mode == "Query plan":
+                            plan, result = run_plan(query, backend)
+                            messages = answer_messages(query, plan, result)
+                        else:
+                            plan = result = None
+                            # Summaries of the transactions within the token budget, cached per data version
+                            context = build_context(query)
+                            messages = [
+                                {"role": "system", "content": "You are a helpful assistant."},
+                                {"role": "user", "content": f"Here's a summary of the data:\n{context}\n\n{query}"}
+                            ]
+
+                    # Send the query to ChatGPT and show the answer as it is generated
+                    st.success("Response from ChatGPT:")
+                    chat_response = st.write_stream(backend.stream(messages, max_tokens=150))
+                    response_cache.set(key, {'answer': chat_response, 'plan': plan, 'result': result})
+
+                if plan is not None:
+                    with st.expander("Query plan and result"):
+                        st.json(json.dumps(plan, default=str))
+                        st.dataframe(result, hide_index=True)
+
+                stats = response_cache.stats()
+                st.caption(f"Response cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+
+            except PlanError as e:
+                st.error(f"The query plan could not be used: {e}")
 
             except openai.APIError as e:
                 if "insufficient_quota" in str(e):
@@ -55,9 +75,8 @@ if st.button("Send Query"):
                     st.error(f"An error occurred with the OpenAI API: {e}")
             except Exception as e:
                 st.error(f"An unexpected error occurred: {e}")
-    else:
-        st.warning("Please enter a query before clicking the button.")
-
+        else:
+            st.warning("Please enter a query before clicking the button.")
 
 
 # Display the MAC page if this script is run
@@ -71,6 +90,8 @@ def main():
             # the main menu
             app_menu()
 
+        chat_page()
+
     else:
         st.warning("You must log in to access this page.")
         st.stop()  # Stops execution if not logged in
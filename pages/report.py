@@ -2,7 +2,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 # local imports
@@ -10,11 +9,10 @@ from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from wofofiles.globfuncs import get_app_title
 # import the menu
 from wofofiles.menu import app_menu
-# import the database connection
-from wofofiles.conn import username, password, host, port, database
-# import the sales reports
-import pages.reports.R_S as R_S
-import inspect
+# import the permission snapshots
+from wofofiles.permissions import get_permissions, has_page_access
+# import the report catalog (department modules are imported when one of their reports is opened)
+from wofofiles.reports import departments, department_reports, load_report
 
 # page config
 st.set_page_config(
@@ -23,29 +21,12 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Create the SQLAlchemy engine to interact with the database
-connection_string = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-engine = create_engine(connection_string, echo=True)
-
 
 # Function to check user access
 def user_has_access(user_code, section_name):
     try:
-        with engine.connect() as connection:
-            # Check direct user access and group-based access
-            result = connection.execute(text("""
-                SELECT DISTINCT s.SectionName
-                FROM access_control ac
-                JOIN sections s ON ac.SectionCode = s.SectionCode
-                WHERE (ac.UserCode = :user_code 
-                      OR ac.GroupCode IN (
-                          SELECT GroupCode 
-                          FROM access_control 
-                          WHERE UserCode = :user_code AND GroupCode IS NOT NULL
-                      ))
-                AND s.SectionName = :section_name
-            """), {"user_code": user_code, "section_name": section_name})
-            return result.fetchone() is not None
+        # Direct user access and group-based access, from the cached permission snapshot
+        return section_name in get_permissions(user_code)['sections']
     except SQLAlchemyError as e:
         st.error(f"Error checking user access: {e}")
         return False
@@ -56,83 +37,51 @@ current_user_code = st.session_state.get("user_code")
 # Function to get all sections for a user
 def get_user_sections(user_code):
     try:
-        with engine.connect() as connection:
-            result = connection.execute(text("""
-                SELECT DISTINCT s.SectionName
-                FROM access_control ac
-                JOIN sections s ON ac.SectionCode = s.SectionCode
-                WHERE ac.UserCode = :user_code 
-                OR ac.GroupCode IN (
-                    SELECT GroupCode 
-                    FROM access_control 
-                    WHERE UserCode = :user_code AND GroupCode IS NOT NULL
-                )
-            """), {"user_code": user_code})
-            return [row[0] for row in result]
+        return get_permissions(user_code)['sections']
     except SQLAlchemyError as e:
         st.error(f"Error fetching user sections: {e}")
         return []
 
-# Display sales report function
-def display_sales_report():
-    if user_has_access(current_user_code, "Sales"):
+# Display the reports of a department
+def display_department_reports(department):
+    if user_has_access(current_user_code, department):
         try:
-            with engine.connect() as connection:
-                # Get report names with page-level permission check
-                result = connection.execute(text("""
-                    SELECT DISTINCT p.Pagename 
-                    FROM pages p
-                    JOIN access_control ac ON p.PageRef = ac.PageRef
-                    WHERE p.PageRef LIKE 'R_S%'
-                    AND (ac.UserCode = :user_code 
-                        OR ac.GroupCode IN (
-                            SELECT GroupCode 
-                            FROM access_control 
-                            WHERE UserCode = :user_code AND GroupCode IS NOT NULL
-                        ))
-                """), {"user_code": current_user_code})
-                reports = [row[0] for row in result]
-                
-                # Create sidebar selection
-                with st.sidebar:
-                    st.title("Sales Department")
-                    report = st.selectbox(
-                        "**Select a report ⤵**",
-                        [""] + reports,
-                        index=0,
-                        key="report_selectbox_1"
-                    )
-
-                # Get page references with permission check
-                result = connection.execute(text("""
-                    SELECT DISTINCT p.Pagename, p.PageRef
-                    FROM pages p
-                    JOIN access_control ac ON p.PageRef = ac.PageRef
-                    WHERE p.PageRef LIKE 'R_S%'
-                    AND (ac.UserCode = :user_code 
-                        OR ac.GroupCode IN (
-                            SELECT GroupCode 
-                            FROM access_control 
-                            WHERE UserCode = :user_code AND GroupCode IS NOT NULL
-                        ))
-                """), {"user_code": current_user_code})
-                pagesidx = {row[0]: row[1] for row in result}
+            # Report names and page references the user has page-level permission for
+            refs = {report.page_ref for report in department_reports(department)}
+            pagesidx = {name: ref for name, ref in get_permissions(current_user_code)['pages'].items()
+                        if ref in refs}
         except SQLAlchemyError as e:
             st.error(f"Error fetching reports: {e}")
             return
 
+        # Create sidebar selection
+        with st.sidebar:
+            st.title(f"{department} Department")
+            report = st.selectbox(
+                "**Select a report ⤵**",
+                [""] + list(pagesidx),
+                index=0,
+                key=f"report_selectbox_{department}"
+            )
+
         # Get the page code for the selected report
         pagecode = pagesidx.get(report)
 
-        # Get all functions from the R_S module
-        report_functions = {}
-        for name, obj in inspect.getmembers(R_S, inspect.isfunction):
-            if name.startswith("R_S"):
-                report_functions[name] = obj
-
-        # Display the report based on the page code
-        if pagecode and pagecode in report_functions:
-            report_functions[pagecode]()
+        # Check the selected report against the current permissions before opening it
+        # (the snapshot listing the reports may predate a revoked permission)
+        if pagecode:
+            try:
+                if not has_page_access(current_user_code, pagecode):
+                    st.error("You no longer have access to this report.")
+                    return
+            except SQLAlchemyError as e:
+                st.error(f"Error checking report access: {e}")
+                return
+
+        # Display the report based on the page code, only its department module is imported
+        report_function = load_report(pagecode) if pagecode else None
+        if report_function is not None:
+            report_function()
         else:
             st.warning("Please select a report from sidebar")
 
@@ -151,8 +100,10 @@ def main():
 
         if current_user_code:
             user_sections = get_user_sections(current_user_code)
-            if "Sales" in user_sections:
-                display_sales_report()
+            user_departments = [department for department in departments() if department in user_sections]
+            if user_departments:
+                for department in user_departments:
+                    display_department_reports(department)
             else:
                 st.warning("You do not have access to any section. Please contact the administrator.")
         else:
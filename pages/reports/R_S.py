@@ -1,35 +1,32 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-import time
 
 # local imports
-from wofofiles.df_src import returns_report
+from wofofiles.reports import report_datasets
 from wofofiles.globfuncs import format_value
+from wofofiles.queries import use_sql, returns_metadata, query_returns_summary
+from wofofiles.cube import summarize_cube
+
+# Datasets used by the returns report (declared in the report catalog), fetched when it first needs them
+datasets = report_datasets('R_S00001')
 
 
 # Returns Report
 def R_S00001():
 
-    df_1 = returns_report()
-    
-    # Mock function to simulate data retrieval
-    def fetch_data():
-        time.sleep(2)  # Simulate a delay
-        return df_1
-
-    # Caching function with TTL (time-to-live)
-    @st.cache_data(ttl=3600)  # Cache for 1 hour
-    def get_data():
-        return fetch_data()
-
-    if st.sidebar.button("Fetch New Data"):
-        with st.spinner("Fetching new data..."):
-            data = fetch_data()  # Fetch directly without cache
-        st.success("New data fetched!")
-    else:
-        with st.spinner("Retrieving cached data..."):
-            data = get_data()  # Retrieve cached data
+    # The MySQL source is aggregated in SQL, the Excel source is answered from the precomputed cube
+    sql_source = use_sql()
+
+    if not sql_source:
+        # a new version is loaded aside and swapped in, other sessions keep reading the current one meanwhile
+        if st.sidebar.button("Fetch New Data"):
+            with st.spinner("Fetching new data..."):
+                datasets['returns_cube'].refresh()
+            st.success("New data fetched!")
+
+        # the cube shared by every session of this process (not a copy per caller)
+        data = datasets['returns_cube'].get()
 
     # Filters
 
@@ -40,38 +37,36 @@ def R_S00001():
         # Report title
         st.title("Returns Report")
 
+    # Store list and date bounds come precomputed with the dataset
+    info = returns_metadata()
+
     with col2:
-        selected_store = st.selectbox("Store Name", df_1['StoreName'].unique())
+        selected_store = st.selectbox("Store Name", info['stores'])
 
     with col3:    
         date_range = st.date_input(
             "Date Range",
-            value=(pd.Timestamp(df_1['TransactionDate'].min()).to_pydatetime(), pd.Timestamp(df_1['TransactionDate'].max()).to_pydatetime()),
-            min_value=pd.Timestamp(df_1['TransactionDate'].min()).to_pydatetime(),
-            max_value=pd.Timestamp(df_1['TransactionDate'].max()).to_pydatetime()
+            value=(info['date_min'], info['date_max']),
+            min_value=info['date_min'],
+            max_value=info['date_max']
         )
 
-    # Ensure 'TransactionDate' is in datetime format
-    # Ensure 'TransactionDate' is in datetime format if it exists
-    if 'TransactionDate' in data.columns:
-        try:
-            data['TransactionDate'] = pd.to_datetime(data['TransactionDate'], format="%d-%m-%Y", dayfirst=True)
-        except Exception as e:
-            st.error(f"Error converting 'TransactionDate' to datetime: {e}")
-            return
     # Convert date_range to datetime64[ns] for comparison
     date_range = pd.to_datetime(date_range)
 
-    # Apply filters to the data
-    filtered_data = data[(data['StoreName'] == selected_store) & 
-                         (data['TransactionDate'] >= date_range[0]) & 
-                         (data['TransactionDate'] <= date_range[1])]
+    # Aggregated sales and returns for the selected store and dates, per dimension
+    if sql_source:
+        def summarize(dimension=None):
+            return query_returns_summary(dimension, selected_store, date_range[0], date_range[1])
+    else:
+        # sum the pre-aggregated daily rows of the selected store and dates
+        def summarize(dimension=None):
+            return summarize_cube(data, dimension, selected_store, date_range[0], date_range[1])
 
     # Calculate the total sales and returns
-    Total_Sales = (filtered_data['SalesPrice'] - filtered_data['DiscountValue']) * filtered_data['SalesQuantity']
-    Total_Sales_Sum = Total_Sales.sum()
-    Total_Return = (filtered_data['SalesPrice'] - filtered_data['DiscountValue']) * filtered_data['ReturnQuantity']
-    Total_Return_Sum = Total_Return.sum()
+    totals = summarize().iloc[0]
+    Total_Sales_Sum = totals['SalesValue']
+    Total_Return_Sum = totals['ReturnValue']
     Return_Rate = (Total_Return_Sum / Total_Sales_Sum) * 100
     Return_Rate = "{:.1f}".format(Return_Rate)
 
@@ -81,9 +76,9 @@ def R_S00001():
 
     # Function to calculate return rate
     def calculate_return_rate(group_by_column):
-        group_by = filtered_data.groupby(group_by_column)
-        sales_value = group_by.apply(lambda x: ((x['SalesPrice'] - x['DiscountValue']) * x['SalesQuantity']).sum())
-        return_value = group_by.apply(lambda x: ((x['SalesPrice'] - x['DiscountValue']) * x['ReturnQuantity']).sum())
+        summary = summarize(group_by_column)
+        sales_value = summary['SalesValue']
+        return_value = summary['ReturnValue']
         return_rate = (return_value / sales_value) * 100
         return_rate = return_rate.fillna(0).round(1).astype(str) + '%'
         return sales_value, return_value, return_rate
@@ -136,9 +131,9 @@ def R_S00001():
 
     with st.expander("**Item-wise Analysis**", expanded=False):
         # Calculate and display return rate per item name
-        group_by_item = filtered_data.groupby('ItemNameEn')
-        item_sales_qty = group_by_item['SalesQuantity'].sum()
-        item_return_qty = group_by_item['ReturnQuantity'].sum()
+        item_summary = summarize('ItemNameEn')
+        item_sales_qty = item_summary['SalesQuantity']
+        item_return_qty = item_summary['ReturnQuantity']
         non_zero_return_mask = item_return_qty > 0
         item_sales_qty = item_sales_qty[non_zero_return_mask]
         item_return_qty = item_return_qty[non_zero_return_mask]
@@ -1,7 +1,7 @@
 # import the libraries
 import streamlit as st
 import hashlib
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 import sys
 print(sys.executable)
@@ -11,8 +11,11 @@ print(sys.executable)
 from wofofiles.globfuncs import get_app_title
 # import the menu
 from wofofiles.menu import app_menu
-# import the database connection
-from wofofiles.conn import username, password, host, port, database
+# import the shared database engine
+from wofofiles.engine import get_engine
+# import the cache pre-warmer
+from wofofiles import conn
+from wofofiles.prewarm import start_prewarm
 
 # page config
 st.set_page_config(
@@ -21,15 +24,21 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Create a connection string for the MySQL database
-connection_string = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-
-# Create the SQLAlchemy engine to interact with the database
+# Get the shared SQLAlchemy engine to interact with the database
 try:
-    engine = create_engine(connection_string, echo=True)
+    engine = get_engine()
 except SQLAlchemyError as e:
     st.error(f"Failed to connect to the database: {e}")
 
+# Start the background refresh of the cached datasets once per server process,
+# so reruns find them loaded instead of waiting for an expired cache
+@st.cache_resource
+def prewarm_scheduler():
+    return start_prewarm()
+
+if conn.prewarm_enabled:
+    prewarm_scheduler()
+
 # Hashing the password
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -0,0 +1,24 @@
+# Run the tests against the repository's packages (wofofiles, pages)
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# A few transactions in the store schema (categorical names), shared by the tests
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        'TransactionDate': pd.to_datetime(['2024-11-01', '2024-11-02', '2024-11-02', '2024-12-01']),
+        'StoreName': pd.Categorical(['Store 1', 'Store 1', 'Store 2', 'Store 2']),
+        'CustomerName': pd.Categorical(['Walk-in', 'Bupa', 'Walk-in', 'Walk-in']),
+        'UserName': pd.Categorical(['Ali', 'Sara', 'Ali', 'Sara']),
+        'GroupName': pd.Categorical(['Drugs', 'Drugs', 'Food', 'Food']),
+        'ItemNameEn': pd.Categorical(['PANADOL EXTRA', 'PANADOL NIGHT', 'MILK', 'MILK']),
+        'SalesPrice': [10.0, 20.0, 5.0, 5.0],
+        'DiscountValue': [0.0, 0.0, 1.0, 0.0],
+        'SalesQuantity': [3.0, 1.0, 2.0, 4.0],
+        'ReturnQuantity': [1, 0, 0, 1],
+    })
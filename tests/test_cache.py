@@ -0,0 +1,122 @@
+# Single-flight loads, stale-while-revalidate and LRU eviction of the in-memory cache
+import multiprocessing
+import threading
+import time
+
+from wofofiles import locks
+from wofofiles.cache import TTLCache, make_key, ttl_cache
+
+
+def run_threads(target, count):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(i):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_misses_are_coalesced():
+    calls = []
+
+    @ttl_cache(ttl=60)
+    def load(key):
+        calls.append(key)
+        time.sleep(0.2)
+        return object()
+
+    results = run_threads(lambda: load('a'), 5)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    stats = load.cache.stats()
+    assert (stats['misses'], stats['hits'], stats['coalesced']) == (5, 0, 4)
+    assert load('a') is results[0]
+    assert load.cache.stats()['hits'] == 1
+
+def test_expired_value_is_served_while_it_reloads():
+    versions = iter(range(1, 100))
+    reloading = threading.Event()
+    release = threading.Event()
+
+    @ttl_cache(ttl=0.5, stale_ttl=10)
+    def load():
+        version = next(versions)
+        if version > 1:
+            reloading.set()
+            release.wait(5)
+        return version
+
+    assert load() == 1
+    time.sleep(0.55)
+
+    # the stale value comes back at once, one background reload runs
+    assert run_threads(load, 3) == [1, 1, 1]
+    assert reloading.wait(5)
+    release.set()
+    for _ in range(50):
+        if load.cache.peek(make_key((), {}))[1] == 2:
+            break
+        time.sleep(0.02)
+    assert load() == 2
+    stats = load.cache.stats()
+    assert stats['stale_hits'] == 3
+    assert next(versions) == 3  # the three stale reads started a single reload
+
+def test_lru_eviction_by_count_and_bytes():
+    cache = TTLCache(60, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == ('fresh', 1)
+    cache.set('c', 3)  # 'b' is the least recently used
+    assert cache.peek('b') == (None, None)
+    assert cache.peek('a') == ('fresh', 1)
+    assert cache.stats()['evictions'] == 1
+
+    cache = TTLCache(60, max_bytes=1000)
+    cache.set('small', b'x' * 100)
+    cache.set('large', b'x' * 950)  # the newest entry is always kept
+    assert cache.peek('small') == (None, None)
+    assert cache.peek('large')[0] == 'fresh'
+
+def _hold_file_lock(name, lock_dir, intervals):
+    locks.lock_dir = lock_dir
+    with locks.file_lock(name):
+        start = time.time()
+        time.sleep(0.2)
+        intervals.append((start, time.time()))
+
+def test_file_lock_serializes_processes(tmp_path):
+    context = multiprocessing.get_context('fork')
+    with context.Manager() as manager:
+        intervals = manager.list()
+        processes = [context.Process(target=_hold_file_lock, args=('flight', str(tmp_path), intervals)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(10)
+        intervals = sorted(intervals)
+
+    assert len(intervals) == 3
+    assert all(previous[1] <= current[0] for previous, current in zip(intervals, intervals[1:]))
+
+def test_single_flight_across_processes_waits(tmp_path, monkeypatch):
+    monkeypatch.setattr(locks, 'lock_dir', str(tmp_path))
+    order = []
+
+    def flight(label):
+        with locks.single_flight('load', across_processes=True):
+            order.append(f"{label} in")
+            time.sleep(0.1)
+            order.append(f"{label} out")
+
+    run_threads(lambda: flight(threading.current_thread().name), 3)
+    assert all(order[i].endswith(" in") and order[i + 1] == order[i][:-3] + " out" for i in range(0, 6, 2))
+    assert locks._flights == {}
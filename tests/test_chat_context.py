@@ -0,0 +1,28 @@
+# Names picked from a chat question for the data context
+import pandas as pd
+import pytest
+
+from wofofiles.chat_context import mentioned_names
+
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        'StoreName': pd.Categorical(['Store 1', 'Store 12', 'Most Store']),
+        'ItemNameEn': pd.Categorical(['PANADOL EXTRA', 'PANADOLINE', 'WHICH WAY TEA']),
+    })
+
+
+def test_whole_names_and_words_match(transactions):
+    assert mentioned_names(transactions, 'StoreName', "Returns of store 1 last month?") == ['Store 1']
+    assert mentioned_names(transactions, 'ItemNameEn', "How much panadol extra was sold") == ['PANADOL EXTRA']
+    assert mentioned_names(transactions, 'ItemNameEn', "extra sales") == ['PANADOL EXTRA']
+
+def test_no_partial_words(transactions):
+    # "panadol" is not a word of PANADOLINE, "store 1" is not "Store 12"
+    assert mentioned_names(transactions, 'ItemNameEn', "panadol returns") == ['PANADOL EXTRA']
+    assert mentioned_names(transactions, 'StoreName', "store 1") == ['Store 1']
+
+def test_stopwords_do_not_match(transactions):
+    assert mentioned_names(transactions, 'StoreName', "Which store has the most returns?") == []
+    assert mentioned_names(transactions, 'ItemNameEn', "Which item sold most?") == []
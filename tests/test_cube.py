@@ -0,0 +1,37 @@
+# Returns cube kept in step with the transactions by update_cube
+import pandas as pd
+
+from wofofiles.cube import build_cube, changed_days, day_digests, update_cube
+
+
+def assert_same_cube(cube, expected):
+    assert cube.keys() == expected.keys()
+    for name in expected:
+        pd.testing.assert_frame_equal(cube[name], expected[name], check_dtype=False, check_categorical=False)
+
+
+def test_day_digests_ignore_row_order(transactions):
+    assert day_digests(transactions) == day_digests(transactions.iloc[::-1])
+
+def test_corrected_earlier_day_is_aggregated_again(transactions):
+    cube = build_cube(transactions)
+    corrected = transactions.copy()
+    corrected.loc[0, 'ReturnQuantity'] = 3
+
+    days = changed_days(day_digests(transactions), day_digests(corrected))
+    assert list(days) == [pd.Timestamp('2024-11-01')]
+    assert_same_cube(update_cube(cube, corrected, days), build_cube(corrected))
+
+def test_added_and_removed_days(transactions):
+    cube = build_cube(transactions)
+    added = pd.concat([transactions, transactions.iloc[[3]].assign(TransactionDate=pd.Timestamp('2024-11-04'))], ignore_index=True)
+    days = changed_days(day_digests(transactions), day_digests(added))
+    assert_same_cube(update_cube(cube, added, days), build_cube(added))
+
+    removed = transactions[transactions['TransactionDate'] != '2024-11-02'].reset_index(drop=True)
+    days = changed_days(day_digests(transactions), day_digests(removed))
+    assert_same_cube(update_cube(cube, removed, days), build_cube(removed))
+
+def test_unchanged_transactions_keep_the_cube(transactions):
+    cube = build_cube(transactions)
+    assert update_cube(cube, transactions, changed_days(day_digests(transactions), day_digests(transactions))) is cube
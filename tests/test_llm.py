@@ -0,0 +1,42 @@
+# Response cache and stub backend of the chat pages
+from wofofiles.llm import ResponseCache, StubBackend, normalize_query
+
+
+def test_normalized_repeat_is_a_hit():
+    cache = ResponseCache()
+    cache.set(cache.key("Which store returns most?", "stub", "v1"), "Store 1")
+
+    assert normalize_query("  which STORE   returns most ") == normalize_query("Which store returns most?")
+    assert cache.get(cache.key("  which STORE   returns most ", "stub", "v1")) == "Store 1"
+    assert cache.get(cache.key("Which user returns most?", "stub", "v1")) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+def test_version_model_and_mode_are_part_of_the_key():
+    cache = ResponseCache()
+    cache.set(cache.key("Top store?", "stub", "v1", mode="plan"), "Store 1")
+
+    assert cache.get(cache.key("Top store?", "stub", "v2", mode="plan")) is None
+    assert cache.get(cache.key("Top store?", "gpt-4o", "v1", mode="plan")) is None
+    assert cache.get(cache.key("Top store?", "stub", "v1")) is None
+    assert cache.get(cache.key("Top store?", "stub", "v1", mode="plan")) == "Store 1"
+    assert cache.stats()['hit_rate'] == 0.25
+
+def test_expired_answers_are_not_served():
+    cache = ResponseCache(ttl=0)
+    cache.set(cache.key("Top store?", "stub", "v1"), "Store 1")
+    assert cache.get(cache.key("Top store?", "stub", "v1")) is None
+
+def test_stream_reassembles_the_reply():
+    reply = "Store 1 has the most returns:\n  120 items, 4.5% of sales."
+    backend = StubBackend([reply])
+    pieces = list(backend.stream([{"role": "user", "content": "Top store?"}]))
+
+    assert len(pieces) > 1
+    assert "".join(pieces) == reply
+    assert backend.calls == [[{"role": "user", "content": "Top store?"}]]
+
+def test_stub_replies_in_order_then_repeats_the_last():
+    backend = StubBackend(["first", "second"])
+    assert [backend.complete([]) for _ in range(3)] == ["first", "second", "second"]
+    assert StubBackend(lambda messages: messages[-1]["content"].upper()).complete([{"content": "hi"}]) == "HI"
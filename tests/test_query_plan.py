@@ -0,0 +1,79 @@
+# Query plans answered through the stub backend (no OpenAI client, no workbook)
+import json
+import pandas as pd
+import pytest
+
+from wofofiles.llm import StubBackend
+from wofofiles.query_plan import PlanError, answer_with_plan, run_plan
+
+
+def plan_backend(plan, answer="Stub answer"):
+    return StubBackend([json.dumps(plan), answer])
+
+
+def test_valid_plan_runs_locally(transactions):
+    backend = plan_backend({
+        "filters": [
+            {"column": "ItemNameEn", "op": "contains", "value": "panadol"},
+            {"column": "TransactionDate", "op": ">=", "value": "2024-11-01"},
+            {"column": "SalesQuantity", "op": ">", "value": "0"},
+        ],
+        "group_by": ["StoreName", "UserName"],
+        "measures": ["SalesValue", "ReturnValue", "ReturnRate"],
+        "sort": {"by": "SalesValue", "descending": True},
+        "limit": 5,
+    })
+    answer, plan, result = answer_with_plan("Who sells panadol?", backend, df=transactions)
+
+    assert answer == "Stub answer"
+    assert plan['filters'][1]['value'] == pd.Timestamp('2024-11-01')
+    assert plan['filters'][2]['value'] == 0.0
+    assert result.to_dict('records') == [
+        {'StoreName': 'Store 1', 'UserName': 'Ali', 'SalesValue': 30.0, 'ReturnValue': 10.0, 'ReturnRate': 33.3},
+        {'StoreName': 'Store 1', 'UserName': 'Sara', 'SalesValue': 20.0, 'ReturnValue': 0.0, 'ReturnRate': 0.0},
+    ]
+    # the answer call only gets the result rows, not the transactions
+    assert "PANADOL" not in backend.calls[1][1]['content']
+
+
+@pytest.mark.parametrize('plan, message', [
+    ({"filters": [{"column": "SalesQuantity", "op": ">", "value": "abc"}]}, "Invalid value for 'SalesQuantity'"),
+    ({"filters": [{"column": "TransactionDate", "op": ">=", "value": "not a date"}]}, "Invalid value for 'TransactionDate'"),
+    ({"filters": [{"column": "SalesPrice", "op": "=", "value": True}]}, "Invalid value for 'SalesPrice'"),
+    ({"filters": [{"column": "Password", "op": "=", "value": "x"}]}, "Cannot filter on 'Password'"),
+    ({"filters": [{"column": "StoreName", "op": ">", "value": "x"}]}, "Operator '>' is not allowed"),
+    ({"group_by": "StoreName"}, "'group_by' must be a list"),
+    ({"group_by": ["Password"]}, "Cannot group by 'Password'"),
+    ({"group_by": ["StoreName", "StoreName"]}, "Duplicate group columns"),
+    ({"measures": "SalesValue"}, "'measures' must be a list"),
+    ({"measures": ["Profit"]}, "Unknown measure 'Profit'"),
+    ({"sort": {"by": "Profit"}}, "Invalid sort"),
+    ({"sort": {"by": "SalesValue", "descending": "false"}}, "Invalid sort"),
+    ({"limit": True}, "Invalid limit"),
+    ({"limit": 0}, "Invalid limit"),
+    ({"drop": "table"}, "Unknown plan keys"),
+])
+def test_invalid_plans_raise_plan_error(transactions, plan, message):
+    with pytest.raises(PlanError, match=message):
+        run_plan("question", plan_backend(plan), df=transactions)
+
+def test_reply_without_json_raises_plan_error(transactions):
+    with pytest.raises(PlanError, match="no JSON plan"):
+        run_plan("question", StubBackend(["I cannot help with that."]), df=transactions)
+
+def test_optional_keys_and_dates(transactions):
+    backend = plan_backend({
+        "filters": [{"column": "TransactionDate", "op": ">=", "value": "2024-11-02T00:00:00Z"}],
+        "group_by": ["StoreName"],
+        "measures": ["SalesValue"],
+        "sort": {"by": "SalesValue", "descending": False},
+        "limit": None,
+    })
+    plan, result = run_plan("question", backend, df=transactions)
+
+    assert plan['filters'][0]['value'] == pd.Timestamp('2024-11-02')
+    assert plan['limit'] == 50
+    assert result.to_dict('records') == [
+        {'StoreName': 'Store 1', 'SalesValue': 20.0},
+        {'StoreName': 'Store 2', 'SalesValue': 28.0},
+    ]
@@ -0,0 +1,163 @@
+# Python libraries
+from contextlib import nullcontext
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+# Local imports
+from wofofiles.cache import ttl_cache
+from wofofiles.engine import get_engine
+from wofofiles.permissions import permissions_version, permissions_write
+
+
+# Listing of each admin table: the FROM clause, the displayed columns (display name -> SQL column)
+# and the key columns giving a stable order between pages
+# only these names are put into the query text, search values are bound parameters
+admin_tables = {
+    'users': {
+        'from': "users",
+        'columns': {"User Code": "UserCode", "User Name": "UserName"},
+        'keys': ["UserCode"],
+    },
+    'groups': {
+        'from': "`groups`",
+        'columns': {"Group Code": "GroupCode", "Group Name": "GroupName"},
+        'keys': ["GroupCode"],
+    },
+    'sections': {
+        'from': "sections",
+        'columns': {"Section Code": "SectionCode", "Section Name": "SectionName"},
+        'keys': ["SectionCode"],
+    },
+    'pages': {
+        'from': "pages",
+        'columns': {"Page Reference": "PageRef", "Page Name": "PageName"},
+        'keys': ["PageRef"],
+    },
+    'access_control': {
+        'from': """access_control ac
+            JOIN users u ON ac.UserCode = u.UserCode
+            LEFT JOIN `groups` g ON ac.GroupCode = g.GroupCode
+            LEFT JOIN sections s ON ac.SectionCode = s.SectionCode
+            LEFT JOIN pages p ON ac.PageRef = p.PageRef""",
+        'columns': {
+            "User Code": "ac.UserCode", "User Name": "u.UserName",
+            "Group Code": "ac.GroupCode", "Group Name": "g.GroupName",
+            "Section Code": "ac.SectionCode", "Section Name": "s.SectionName",
+            "Page Ref": "ac.PageRef", "Page Name": "p.PageName",
+        },
+        'keys': ["ac.UserCode", "ac.PageRef"],
+    },
+}
+
+
+# WHERE clause matching the search text in any displayed column
+def search_clause(table, search):
+    if not search:
+        return "", {}
+    columns = admin_tables[table]['columns'].values()
+    clause = " OR ".join(f"CAST({column} AS CHAR) LIKE :search" for column in columns)
+    return f" WHERE ({clause})", {'search': f"%{search}%"}
+
+# Function to count the rows of an admin table matching the search (on the given connection, or a new one)
+def count_rows(table, search="", connection=None):
+    where, params = search_clause(table, search)
+    with get_engine().connect() if connection is None else nullcontext(connection) as connection:
+        return connection.execute(text(f"SELECT COUNT(*) FROM {admin_tables[table]['from']}{where}"), params).scalar()
+
+# Function to fetch one page of an admin table, searched and sorted in the database
+# sort: display name of the sort column; page: 1-based page number; connection: reused when given
+def fetch_page(table, search="", sort=None, descending=False, page=1, page_size=50, connection=None):
+    spec = admin_tables[table]
+    where, params = search_clause(table, search)
+    order = [f"{spec['columns'][sort]} {'DESC' if descending else 'ASC'}"] if sort else []
+    order += spec['keys']
+    select = ", ".join(spec['columns'].values())
+    query = text(f"""
+        SELECT {select} FROM {spec['from']}{where}
+        ORDER BY {", ".join(order)}
+        LIMIT :limit OFFSET :offset
+    """)
+    params.update(limit=page_size, offset=(page - 1) * page_size)
+    with get_engine().connect() if connection is None else nullcontext(connection) as connection:
+        rows = connection.execute(query, params).fetchall()
+    return pd.DataFrame(rows, columns=list(spec['columns']))
+
+# Dropdown options of the permissions editor: display value -> code
+# cached per permissions version, so any admin write (which bumps the version) reloads them
+@ttl_cache(ttl=300, maxsize=4)
+def load_options(version):
+    with get_engine().connect() as connection:
+        users = pd.DataFrame(connection.execute(text("SELECT UserCode, UserName FROM users")).fetchall(), columns=["UserCode", "UserName"])
+        groups = connection.execute(text("SELECT GroupCode, GroupName FROM `groups`")).fetchall()
+        sections = connection.execute(text("SELECT SectionCode, SectionName FROM sections")).fetchall()
+        pages = connection.execute(text("SELECT PageRef, PageName FROM pages")).fetchall()
+    return {
+        'users': dict(zip(user_display(users["UserName"], users["UserCode"]), users["UserCode"].tolist())),
+        'groups': {"None": None} | {group.GroupName: group.GroupCode for group in groups},
+        'sections': {"None": None} | {section.SectionName: section.SectionCode for section in sections},
+        'pages': {page.PageName: page.PageRef for page in pages},
+    }
+
+def get_options():
+    return load_options(permissions_version())
+
+# "Name (Code)" labels of users, built column-wise
+def user_display(names, codes):
+    return names.astype(str) + " (" + codes.astype(str) + ")"
+
+
+# Function to find the rows changed in st.data_editor, compared column-wise with the loaded frame
+# returns the original and the edited version of the changed rows
+def changed_rows(df, edited_df, columns):
+    original = df[columns].reset_index(drop=True)
+    edited = edited_df[columns].reset_index(drop=True)
+    same = (original == edited) | (original.isna() & edited.isna())
+    changed = ~same.all(axis=1)
+    return original[changed], edited[changed]
+
+# Function to build row parameters from frame columns: {param: series}
+# (values converted to plain Python objects, missing values to None)
+def batch_params(columns):
+    params = pd.DataFrame(columns)
+    return params.astype(object).where(params.notna(), None).to_dict('records')
+
+# Delete many rows in one statement: keys maps each key column to the values of the rows to delete
+# (WHERE key IN (...), or (key1, key2) IN ((...), ...) for a composite key), returns the number of rows
+def delete_rows(table, keys):
+    columns = list(keys)
+    rows = [tuple(row[column] for column in columns) for row in batch_params(keys)]
+    if not rows:
+        return 0
+    if len(columns) == 1:
+        target, values = columns[0], [row[0] for row in rows]
+    else:
+        target, values = "(" + ", ".join(columns) + ")", rows
+    query = text(f"DELETE FROM {table} WHERE {target} IN :keys").bindparams(bindparam('keys', expanding=True))
+    with permissions_write() as connection:
+        connection.execute(query, {'keys': values})
+    return len(rows)
+
+# Update many rows in one statement: values maps the updated columns to their new values,
+# keys the key columns to their original values (same rows, same order)
+# the rows are joined as a derived table: UPDATE t JOIN (SELECT ... UNION ALL SELECT ...) v ON keys SET columns
+# table and column names come from the page code, the values are bound parameters
+def update_rows(table, values, keys):
+    aliases = {f"v{i}": series for i, series in enumerate(values.values())}
+    aliases.update({f"k{i}": series for i, series in enumerate(keys.values())})
+    rows = batch_params(aliases)
+    if not rows:
+        return 0
+    params = {}
+    selects = []
+    for i, row in enumerate(rows):
+        fields = []
+        for alias, value in row.items():
+            params[f"{alias}_{i}"] = value
+            fields.append(f":{alias}_{i} AS {alias}")
+        selects.append("SELECT " + ", ".join(fields))
+    on = " AND ".join(f"t.{column} = v.k{i}" for i, column in enumerate(keys))
+    assignments = ", ".join(f"t.{column} = v.v{i}" for i, column in enumerate(values))
+    query = text(f"UPDATE {table} t JOIN ({' UNION ALL '.join(selects)}) v ON {on} SET {assignments}")
+    with permissions_write() as connection:
+        connection.execute(query, params)
+    return len(rows)
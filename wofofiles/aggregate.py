@@ -0,0 +1,35 @@
+# Python libraries
+import pandas as pd
+
+
+# Summed measures of the returns reports
+measures = ['SalesValue', 'ReturnValue', 'SalesQuantity', 'ReturnQuantity']
+
+
+# Function to compute the measures of every transaction row (net price is computed once, in float64)
+def measure_frame(df):
+    net_price = df['SalesPrice'].to_numpy('float64') - df['DiscountValue'].to_numpy('float64')
+    sales_quantity = df['SalesQuantity'].to_numpy('float64')
+    return_quantity = df['ReturnQuantity'].to_numpy('float64')
+    return pd.DataFrame({
+        'SalesValue': net_price * sales_quantity,
+        'ReturnValue': net_price * return_quantity,
+        'SalesQuantity': sales_quantity,
+        'ReturnQuantity': return_quantity,
+    }, index=df.index)
+
+# Sum the measures for several groupings in one call, like SQL GROUPING SETS
+# sets: name -> list of key columns of keys_df ([] for the grand total)
+# keys_df: frame holding the key columns (defaults to df)
+# every grouping is a native groupby().sum() over the same precomputed measures
+def grouping_sets(df, sets, keys_df=None):
+    keys_df = df if keys_df is None else keys_df
+    values = measure_frame(df)
+    result = {}
+    for name, keys in sets.items():
+        if not keys:
+            result[name] = values.sum().to_frame('Total').T
+        else:
+            by = [keys_df[key] for key in keys]
+            result[name] = values.groupby(by, observed=True).sum()
+    return result
@@ -0,0 +1,333 @@
+# Python libraries
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import pandas as pd
+from joblib import Memory, expires_after, hash as joblib_hash
+
+# Local imports
+from wofofiles.locks import single_flight
+
+
+# Set up a directory for the on-disk cache
+cache_dir = './cache'
+
+# Byte budget of the on-disk results (./cache/joblib), the least recently used are removed past it
+disk_bytes_limit = 1024 ** 3
+
+# Stored results are compressed with lz4 when it is installed (fast enough to beat disk reads), zlib otherwise
+try:
+    import lz4  # noqa: F401
+    disk_compress = ('lz4', 3)
+except ImportError:
+    disk_compress = ('zlib', 3)
+
+memory = Memory(cache_dir, compress=disk_compress, verbose=0)
+
+
+# Function to estimate the memory held by a cached value
+def size_of(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    return sys.getsizeof(value)
+
+# Function to build the cache key of a call from its arguments
+def make_key(args, kwargs):
+    key = (args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        # unhashable arguments (lists, frames, ...) are keyed on their content
+        return joblib_hash(key)
+
+
+# Counters of the on-disk tier, shared by every persisted function
+class DiskCacheStats:
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+disk_stats = DiskCacheStats()
+
+
+# Function to list the results stored on disk
+def disk_items():
+    try:
+        return memory.store_backend.get_items()
+    except OSError:
+        return []
+
+# Remove the least recently used results until the on-disk cache fits the byte budget
+# (one listing of the directory), returns the number of results removed
+def reduce_disk_cache(bytes_limit=None):
+    bytes_limit = bytes_limit if bytes_limit is not None else disk_bytes_limit
+    items = disk_items()
+    excess = sum(item.size for item in items) - bytes_limit
+    evicted = 0
+    for item in sorted(items, key=lambda item: item.last_access):
+        if excess <= 0:
+            break
+        try:
+            memory.store_backend.clear_location(item.path)
+        except OSError:
+            # already removed by another process
+            continue
+        excess -= item.size
+        evicted += 1
+    with disk_stats.lock:
+        disk_stats.evictions += evicted
+    return evicted
+
+# Seconds between two size checks of the on-disk cache after writes
+disk_reduce_interval = 60
+
+_disk_reduce = {'last': 0.0, 'running': False}
+_disk_reduce_lock = threading.Lock()
+
+def _reduce_disk_cache_task():
+    try:
+        reduce_disk_cache()
+    except Exception:
+        # the next write retries
+        pass
+    finally:
+        with _disk_reduce_lock:
+            _disk_reduce['running'] = False
+
+# Check the byte budget in a background thread after a result was written,
+# at most once per disk_reduce_interval so writes never wait for the directory listing
+def schedule_disk_reduce():
+    now = time.monotonic()
+    with _disk_reduce_lock:
+        if _disk_reduce['running'] or now - _disk_reduce['last'] < disk_reduce_interval:
+            return
+        _disk_reduce.update(last=now, running=True)
+    threading.Thread(target=_reduce_disk_cache_task, daemon=True).start()
+
+# Counters and size of the on-disk cache
+def disk_cache_stats():
+    items = disk_items()
+    with disk_stats.lock:
+        return {
+            'items': len(items),
+            'bytes': sum(item.size for item in items),
+            'bytes_limit': disk_bytes_limit,
+            'compress': disk_compress[0],
+            'hits': disk_stats.hits,
+            'misses': disk_stats.misses,
+            'evictions': disk_stats.evictions,
+        }
+
+
+# A cached value with its own expiry
+class CacheEntry:
+    __slots__ = ('value', 'nbytes', 'expires_at', 'stale_until')
+
+    def __init__(self, value, nbytes, expires_at, stale_until):
+        self.value = value
+        self.nbytes = nbytes
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+# In-memory cache with a TTL per entry, LRU eviction by count or bytes, and a stale window
+class TTLCache:
+
+    def __init__(self, ttl, maxsize=None, max_bytes=None, stale_ttl=0):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    # Look up a key, returns ('fresh' | 'stale' | None, value)
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            if now < entry.expires_at:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return 'fresh', entry.value
+            if now < entry.stale_until:
+                self.entries.move_to_end(key)
+                self.stale_hits += 1
+                return 'stale', entry.value
+            # past the stale window, drop it
+            self._remove(key)
+            self.misses += 1
+            return None, None
+
+    # Look up a key without counting it or changing the LRU order, returns ('fresh' | 'stale' | None, value)
+    def peek(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or now >= entry.stale_until:
+                return None, None
+            return ('fresh' if now < entry.expires_at else 'stale'), entry.value
+
+    def set(self, key, value):
+        now = time.monotonic()
+        entry = CacheEntry(value, size_of(value), now + self.ttl, now + self.ttl + self.stale_ttl)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self.nbytes += entry.nbytes
+            self._evict()
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+                self.nbytes = 0
+            elif key in self.entries:
+                self._remove(key)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.nbytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+            }
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.nbytes -= entry.nbytes
+
+    # Drop least recently used entries until the size limits are met (keeps the newest one)
+    def _evict(self):
+        while len(self.entries) > 1 and (
+            (self.maxsize is not None and len(self.entries) > self.maxsize)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            key = next(iter(self.entries))
+            self._remove(key)
+            self.evictions += 1
+
+
+# Decorator caching a function per argument set with a time-to-live
+# ttl: seconds an entry is fresh
+# maxsize / max_bytes: optional LRU limits for the in-memory entries
+# stale_ttl: seconds an expired entry is still served while it reloads in the background
+# persist: also keep results on disk (./cache) with the same ttl, shared between processes
+# (compressed, within disk_bytes_limit)
+# Loads are single-flight per argument set: concurrent misses wait for one load instead of each
+# running it, and an expired entry is reloaded once while the others are served the stale value
+# (with persist the flight is also locked across processes, which then read the loaded value from disk)
+def ttl_cache(ttl=600, maxsize=None, max_bytes=None, stale_ttl=0, persist=False):
+    def decorator(func):
+        cache = TTLCache(ttl, maxsize=maxsize, max_bytes=max_bytes, stale_ttl=stale_ttl)
+        refreshing = set()
+        refreshing_lock = threading.Lock()
+
+        if persist:
+            memorized = memory.cache(func, cache_validation_callback=expires_after(seconds=ttl))
+
+            def load(*args, **kwargs):
+                hit = memorized.check_call_in_cache(*args, **kwargs)
+                disk_stats.record(hit)
+                value = memorized(*args, **kwargs)
+                if not hit:
+                    # a new result was written, keep the directory within its budget
+                    schedule_disk_reduce()
+                return value
+
+            # recompute and overwrite the disk entry, ignoring its age
+            def reload(*args, **kwargs):
+                value = memorized.call(*args, **kwargs)[0]
+                schedule_disk_reduce()
+                return value
+        else:
+            memorized = None
+            load = func
+            reload = func
+
+        def flight(key):
+            return single_flight((func.__module__, func.__qualname__, key), across_processes=persist)
+
+        def background_reload(key, args, kwargs):
+            try:
+                # the disk tier answers when another process reloaded it meanwhile
+                with flight(key):
+                    cache.set(key, load(*args, **kwargs))
+            except Exception:
+                # keep serving the stale value, the next call retries
+                pass
+            finally:
+                with refreshing_lock:
+                    refreshing.discard(key)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            status, value = cache.get(key)
+            if status == 'fresh':
+                return value
+            if status == 'stale':
+                with refreshing_lock:
+                    start = key not in refreshing
+                    refreshing.add(key)
+                if start:
+                    threading.Thread(target=background_reload, args=(key, args, kwargs), daemon=True).start()
+                return value
+            with flight(key):
+                # loaded by another caller while this one waited (its miss is already counted)
+                status, value = cache.peek(key)
+                if status is not None:
+                    with cache.lock:
+                        cache.coalesced += 1
+                    return value
+                value = load(*args, **kwargs)
+                cache.set(key, value)
+            return value
+
+        # Reload one argument set now, bypassing both cache tiers
+        def refresh(*args, **kwargs):
+            value = reload(*args, **kwargs)
+            cache.set(make_key(args, kwargs), value)
+            return value
+
+        # Drop one argument set from memory, or every entry in memory and on disk when called without arguments
+        def invalidate(*args, **kwargs):
+            if args or kwargs:
+                cache.invalidate(make_key(args, kwargs))
+            else:
+                cache.invalidate()
+                if memorized is not None:
+                    memorized.clear(warn=False)
+
+        wrapper.cache = cache
+        wrapper.refresh = refresh
+        wrapper.invalidate = invalidate
+        return wrapper
+    return decorator
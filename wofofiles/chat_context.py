@@ -0,0 +1,175 @@
+# Python libraries
+import re
+
+# Local imports
+from wofofiles.aggregate import grouping_sets
+from wofofiles.cache import ttl_cache
+from wofofiles.datasets import get_metadata, shared_dataset
+from wofofiles.retrieval import retrieval_index
+from wofofiles.schema import category_columns
+
+
+# Default size of the data context sent with a chat question (tokens)
+context_token_budget = 2000
+
+# Names listed per dimension in the aggregates, at most
+top_names = 10
+
+# Aggregate cards of the entities the question is about (see wofofiles/retrieval.py), at most
+top_cards = 8
+
+# Transaction rows quoted when the question names a store, customer, user, group or item
+row_columns = ['TransactionDate', 'StoreName', 'CustomerName', 'UserName', 'GroupName',
+               'ItemNameEn', 'SalesPrice', 'DiscountValue', 'SalesQuantity', 'ReturnQuantity']
+top_rows = 20
+
+# Question words never taken as a name (question words and the report vocabulary)
+stopwords = {
+    'the', 'and', 'for', 'with', 'from', 'that', 'this', 'which', 'what', 'who', 'when', 'where', 'how',
+    'most', 'least', 'more', 'less', 'top', 'best', 'worst', 'highest', 'lowest', 'many', 'much', 'all',
+    'has', 'have', 'had', 'did', 'does', 'are', 'was', 'were', 'per', 'each', 'last', 'first', 'show', 'list',
+    'store', 'stores', 'branch', 'customer', 'customers', 'user', 'users', 'cashier', 'group', 'groups',
+    'item', 'items', 'product', 'products', 'sales', 'sale', 'sold', 'sell', 'returns', 'return', 'returned',
+    'value', 'quantity', 'rate', 'total', 'day', 'days', 'month', 'months', 'year', 'week',
+}
+
+
+# Rough token count of a text (about 4 bytes per token, so Arabic names count about double)
+def estimate_tokens(text):
+    return len(text.encode('utf-8')) // 4 + 1
+
+# Short text of a number or a cell (whole numbers without decimals, dates without time)
+def _number(value):
+    value = float(value)
+    return f"{value:.0f}" if abs(value) >= 100 or value.is_integer() else f"{value:.2f}"
+
+def _cell(value):
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, float):
+        return _number(value)
+    return str(value)
+
+
+# Version of the data the chat answers from (changes when the workbook is re-ingested)
+def data_version():
+    return get_metadata('transactions')['version']
+
+# Sections of the context that do not depend on the question, built once per data version:
+# schema, date bounds, totals and the top names of every dimension
+@ttl_cache(ttl=3600, maxsize=4)
+def base_context(version):
+    df = shared_dataset('transactions').get()
+    meta = get_metadata('transactions')
+    sets = {'Total': []} | {column: [column] for column in category_columns}
+    aggregates = grouping_sets(df, sets)
+
+    total = aggregates['Total'].iloc[0]
+    header = [
+        f"Transactions: {meta['rows']} rows, {len(meta['stores'])} stores, "
+        f"dates {meta['date_min']:%Y-%m-%d} to {meta['date_max']:%Y-%m-%d}",
+        "Columns: " + ", ".join(f"{column} ({dtype})" for column, dtype in df.dtypes.astype(str).items()),
+        "SalesValue = (SalesPrice - DiscountValue) * SalesQuantity, ReturnValue likewise with ReturnQuantity",
+        f"Totals: SalesValue {_number(total['SalesValue'])}, ReturnValue {_number(total['ReturnValue'])}, "
+        f"SalesQuantity {_number(total['SalesQuantity'])}, ReturnQuantity {_number(total['ReturnQuantity'])}",
+    ]
+
+    # one line per name, best sellers first, so a dimension can be cut to any length
+    dimensions = {}
+    for column in category_columns:
+        part = aggregates[column].sort_values('SalesValue', ascending=False)
+        lines = [
+            f"{name}|{_number(row.SalesValue)}|{_number(row.ReturnValue)}|{_number(row.SalesQuantity)}|{_number(row.ReturnQuantity)}"
+            for name, row in zip(part.index, part.itertuples(index=False))
+        ]
+        dimensions[column] = (len(part), lines)
+    return {'header': header, 'dimensions': dimensions}
+
+# Lowercase words of a text
+def tokens(text):
+    return re.findall(r"\w+", str(text).lower())
+
+# Names of a dimension mentioned in the question: the whole name appears in it,
+# or one of its words (3 letters or more, not a stopword) is a word of the name
+def mentioned_names(df, column, question):
+    question_tokens = tokens(question)
+    text = f" {' '.join(question_tokens)} "
+    words = {word for word in question_tokens if len(word) >= 3 and word not in stopwords}
+    names = []
+    for name in df[column].cat.categories:
+        name_tokens = tokens(name)
+        if not name_tokens:
+            continue
+        if f" {' '.join(name_tokens)} " in text or not words.isdisjoint(name_tokens):
+            names.append(name)
+    return names
+
+# Latest transaction rows about the names the question mentions (empty when it names none)
+def relevant_rows(question, limit=top_rows):
+    df = shared_dataset('transactions').get()
+    mask = None
+    for column in category_columns:
+        names = mentioned_names(df, column, question)
+        if names:
+            match = df[column].isin(names)
+            mask = match if mask is None else mask | match
+    if mask is None:
+        return []
+    rows = df.loc[mask, row_columns].nlargest(limit, 'TransactionDate')
+    return ["|".join(_cell(value) for value in row) for row in rows.itertuples(index=False)]
+
+
+# Build the data context of a chat question within a token budget
+# sections are added by priority: schema and totals, the cards of the entities the question is about
+# (up to half of what is left), the aggregates of every dimension (cut to fewer names when they do not fit),
+# then the rows relevant to the question
+def build_context(question, budget=None):
+    budget = budget or context_token_budget
+    version = data_version()
+    base = base_context(version)
+
+    parts = list(base['header'])
+    used = sum(estimate_tokens(part) for part in parts)
+
+    cards = retrieval_index(version).search(question, k=top_cards)
+    if cards:
+        card_budget = used + (budget - used) // 2
+        heading = "Entities matching the question:"
+        selected = []
+        cost = estimate_tokens(heading)
+        for _, _, _, card in cards:
+            if used + cost + estimate_tokens(card) > card_budget:
+                break
+            selected.append(card)
+            cost += estimate_tokens(card)
+        if selected:
+            parts.append(heading)
+            parts.extend(selected)
+            used += cost
+
+    # the same number of names for every dimension, as many as the budget allows (up to top_names)
+    dimensions = base['dimensions']
+    for count in range(top_names, 0, -1):
+        sections = []
+        for column, (total, lines) in dimensions.items():
+            sections.append(f"{column} top {min(count, total)} of {total} (name|SalesValue|ReturnValue|SalesQuantity|ReturnQuantity):")
+            sections.extend(lines[:count])
+        cost = sum(estimate_tokens(section) for section in sections)
+        if used + cost <= budget or count == 1:
+            parts.extend(sections)
+            used += cost
+            break
+
+    rows = relevant_rows(question)
+    if rows:
+        heading = "Latest matching transactions (" + "|".join(row_columns) + "):"
+        if used + estimate_tokens(heading) < budget:
+            parts.append(heading)
+            used += estimate_tokens(heading)
+            for row in rows:
+                cost = estimate_tokens(row)
+                if used + cost > budget:
+                    break
+                parts.append(row)
+                used += cost
+    return "\n".join(parts)
@@ -3,4 +3,23 @@ username = 'inveadmin'
 password = 'hUHD2012'
 host = 'invedb-1.czk66ggyuhje.eu-west-2.rds.amazonaws.com'
 port = 3306
-database = 'lem_schema'  # replace with your actual database name
\ No newline at end of file
+database = 'lem_schema'  # replace with your actual database name
+
+# Connection pool settings for the shared engine (wofofiles/engine.py)
+pool_size = 5  # connections kept open per process
+max_overflow = 10  # extra connections allowed when the pool is exhausted
+pool_timeout = 30  # seconds to wait for a free connection
+pool_recycle = 1800  # seconds before a connection is replaced (RDS drops idle ones)
+pool_pre_ping = True  # test connections before handing them out
+echo = False  # log every SQL statement
+
+# Where the transaction data lives: 'excel' (draft workbook, see wofofiles/store.py)
+# or 'mysql' (transactions_table, with the same column names as the transaction schema)
+transactions_source = 'excel'
+transactions_table = 'daily_transactions'
+
+# Background cache pre-warming (wofofiles/prewarm.py), started with the app
+prewarm_enabled = True
+prewarm_fraction = 0.8  # refresh a cached dataset after this share of its ttl, before it expires
+prewarm_intervals = {'store': 300}  # seconds between refreshes, per dataset name ('store': workbook ingest and cube)
+# the 'store' task is what picks up a changed workbook, reports only read the stored copy
@@ -0,0 +1,68 @@
+# Python libraries
+import pandas as pd
+
+# Local imports
+from wofofiles.aggregate import measures, grouping_sets
+from wofofiles.index import StoreDateIndex
+
+
+# Dimensions of the returns cube, each one is aggregated by store, day and the dimension
+cube_dimensions = ('CustomerName', 'UserName', 'GroupName', 'ItemNameEn')
+
+# Summed measures kept in the cube
+cube_measures = measures
+
+
+# Build the cube from transaction rows: one frame per dimension plus the store/day totals
+# all groupings are summed in one grouping_sets call over the same precomputed measures
+def build_cube(df):
+    keys = df[['StoreName', *cube_dimensions]].assign(TransactionDate=df['TransactionDate'].dt.normalize())
+    sets = {'Total': ['StoreName', 'TransactionDate']}
+    sets.update({dimension: ['StoreName', 'TransactionDate', dimension] for dimension in cube_dimensions})
+    cube = grouping_sets(df, sets, keys_df=keys)
+    return {name: part.reset_index().sort_values(['StoreName', 'TransactionDate'], ignore_index=True) for name, part in cube.items()}
+
+# Checksum of the rows of every day: 'YYYY-MM-DD' -> 'rows:hash' (sum of the row hashes, so the row order does not matter)
+def day_digests(df):
+    days = df['TransactionDate'].dt.normalize()
+    hashes = pd.util.hash_pandas_object(df, index=False)
+    grouped = hashes.groupby(days.values)
+    counts, sums = grouped.size(), grouped.sum()
+    return {f"{day:%Y-%m-%d}": f"{counts[day]}:{sums[day]}" for day in counts.index}
+
+# Days whose rows differ between two day_digests (added, removed or corrected)
+def changed_days(previous, current):
+    days = {day for day in previous.keys() | current.keys() if previous.get(day) != current.get(day)}
+    return pd.DatetimeIndex(sorted(days))
+
+# Aggregate the changed days of the transactions again, the other days are kept as they are
+# rows of days no longer in the transactions are dropped
+def update_cube(cube, df, days):
+    if len(days) == 0:
+        return cube
+    new_rows = df[df['TransactionDate'].dt.normalize().isin(days)]
+    added = build_cube(new_rows) if not new_rows.empty else {}
+    updated = {}
+    for name, part in cube.items():
+        kept = part[~part['TransactionDate'].isin(days)]
+        merged = pd.concat([kept, added[name]], ignore_index=True) if name in added else kept
+        # keep the name columns categorical after the concat
+        for column in merged.columns.difference(cube_measures + ['TransactionDate']):
+            merged[column] = merged[column].astype('category')
+        updated[name] = merged.sort_values(['StoreName', 'TransactionDate'], ignore_index=True)
+    return updated
+
+# Index every cube part by store and day (the parts are stored sorted, so this only finds the store blocks)
+def index_cube(cube):
+    return {name: StoreDateIndex(part) for name, part in cube.items()}
+
+# Answer the returns report from the cube for one store and date range
+# same output as query_returns_summary on the MySQL source
+def summarize_cube(cube, dimension, store, start, end):
+    part = cube['Total' if dimension is None else dimension]
+    if not isinstance(part, StoreDateIndex):
+        part = StoreDateIndex(part)
+    rows = part.slice(store, start, end)
+    if dimension is None:
+        return rows[cube_measures].sum().to_frame('Total').T
+    return rows.groupby(dimension, observed=True)[cube_measures].sum()
@@ -0,0 +1,169 @@
+# Python libraries
+import importlib
+import threading
+import time
+import pandas as pd
+
+
+# Modules defining datasets, imported the first time a dataset is requested
+loader_modules = ['wofofiles.df_src']
+
+# Registered datasets: name -> loader function, and their metadata functions
+_loaders = {}
+_metadata = {}
+# Datasets declared by each page: page -> names
+_page_datasets = {}
+_import_lock = threading.Lock()
+_imported = False
+# Shared handles: name -> SharedDataset, one per process
+_shared = {}
+_shared_lock = threading.Lock()
+
+# Datasets are shared between sessions, so filters must never write into them:
+# with copy-on-write every derived frame gets its own data when it is modified (always on from pandas 3)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+# Decorator registering a loader function as a named dataset
+# metadata: optional function returning facts about the data (date bounds, store list, ...)
+# computed when the data is stored, so pages do not have to scan the frame
+def register_dataset(name, metadata=None):
+    def decorator(func):
+        _loaders[name] = func
+        if metadata is not None:
+            _metadata[name] = metadata
+        return func
+    return decorator
+
+# Import the loader modules once so their datasets are registered
+def _import_loaders():
+    global _imported
+    if not _imported:
+        with _import_lock:
+            if not _imported:
+                for module in loader_modules:
+                    importlib.import_module(module)
+                _imported = True
+
+def get_loader(name):
+    _import_loaders()
+    try:
+        return _loaders[name]
+    except KeyError:
+        raise KeyError(f"Unknown dataset '{name}'") from None
+
+# Function to get a dataset, it is fetched on first use and then served by the loader's cache
+def get_dataset(name):
+    return get_loader(name)()
+
+# Function to get the metadata of a dataset (empty when it has none)
+def get_metadata(name):
+    get_loader(name)
+    metadata = _metadata.get(name)
+    return metadata() if metadata is not None else {}
+
+def dataset_names():
+    _import_loaders()
+    return sorted(_loaders)
+
+
+# Handle to a dataset that is only fetched when get() is called
+# the value is the process-wide shared copy, treat it as read-only
+class LazyDataset:
+
+    def __init__(self, name):
+        self.name = name
+
+    def get(self):
+        return shared_dataset(self.name).get()
+
+    def snapshot(self):
+        return shared_dataset(self.name).snapshot()
+
+    # Load a new version and swap it in for every session
+    def refresh(self):
+        return shared_dataset(self.name).refresh()
+
+    def metadata(self):
+        return get_metadata(self.name)
+
+    def __repr__(self):
+        return f"LazyDataset({self.name!r})"
+
+
+# Declare the datasets a page needs, nothing is fetched until the page asks for it
+def declare_datasets(page, *names):
+    _page_datasets[page] = tuple(names)
+    return {name: LazyDataset(name) for name in names}
+
+def page_datasets(page):
+    return _page_datasets.get(page, ())
+
+# Load every dataset a page declared (e.g. to warm the cache before it is opened)
+def prefetch(page):
+    for name in page_datasets(page):
+        get_dataset(name)
+
+
+# One loaded version of a dataset, never modified after it is created
+class DatasetSnapshot:
+    __slots__ = ('name', 'value', 'version', 'loaded_at')
+
+    def __init__(self, name, value, version):
+        self.name = name
+        self.value = value
+        self.version = version
+        self.loaded_at = time.time()
+
+    def __repr__(self):
+        return f"DatasetSnapshot({self.name!r}, version={self.version})"
+
+
+# Process-wide handle to a dataset: every session reads the same object instead of its own copy
+# a new version is loaded aside and swapped in with one assignment, readers keep the version they hold
+class SharedDataset:
+
+    def __init__(self, name):
+        self.name = name
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    # The current version, the loader's cache decides when a new one is loaded
+    def snapshot(self):
+        value = get_dataset(self.name)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.value is not value:
+            snapshot = self._swap(value)
+        return snapshot
+
+    def get(self):
+        return self.snapshot().value
+
+    @property
+    def version(self):
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else 0
+
+    # Load a new version now (bypassing the loader's cache) and swap it in
+    def refresh(self):
+        loader = get_loader(self.name)
+        value = loader.refresh() if hasattr(loader, 'refresh') else loader()
+        return self._swap(value)
+
+    def _swap(self, value):
+        with self._lock:
+            current = self._snapshot
+            if current is not None and current.value is value:
+                return current
+            self._snapshot = DatasetSnapshot(self.name, value, self.version + 1)
+            return self._snapshot
+
+
+# Function to get the shared handle of a dataset
+def shared_dataset(name):
+    shared = _shared.get(name)
+    if shared is None:
+        with _shared_lock:
+            shared = _shared.setdefault(name, SharedDataset(name))
+    return shared
@@ -1,100 +1,60 @@
-# Python libraries
-import os
-from datetime import datetime, timedelta
-import pandas as pd
-from sqlalchemy import create_engine, text
-from joblib import Memory
-import datetime as dt
-
 # Local imports
-from wofofiles.conn import username, password, host, port, database
-
-
-# Set up a directory for the cache
-cache_dir = './cache'
-memory = Memory(cache_dir, verbose=0)
-
-# Define the caching function with expiration
-def cache_with_expiry(func, expiry_minutes=10):
-    def wrapper(*args, **kwargs):
-        current_time = datetime.now()
-        cache_file = os.path.join(cache_dir, func.__name__)
-        if os.path.exists(cache_file):
-            cache_time = datetime.fromtimestamp(os.path.getmtime(cache_file))
-            if (current_time - cache_time) < timedelta(minutes=expiry_minutes):
-                return memory.cache(func)(*args, **kwargs)
-            else:
-                # Clear the old cache if expired
-                memory.clear()
-        return memory.cache(func)(*args, **kwargs)
-    return wrapper
-
-# Use your existing function but with caching
-@cache_with_expiry
+from wofofiles.cache import ttl_cache
+from wofofiles.datasets import register_dataset
+from wofofiles.sync import TableSync
+from wofofiles.index import StoreDateIndex
+from wofofiles.cube import index_cube
+from wofofiles.store import read_transactions, read_returns_cube, transactions_metadata, transactions_version
+from wofofiles.reports import report_cache_ttl
+
+
+# Local snapshot of the ownership table, refreshed with only the changed rows
+# set watermark_column to the table's last-modified column to also pick up updated rows,
+# otherwise the primary key is used as a high-water mark and a full reload runs once a day
+ownership_sync = TableSync('ownership', watermark_column=None)
+
+# Cached for 10 minutes, an expired copy is served for 5 more while it syncs
+@register_dataset('ownership')
+@ttl_cache(ttl=600, stale_ttl=300)
 def dataset():
-    query = """
-    SELECT * FROM ownership
-
-    """
-
-    # Create the connection string and engine
-    connection_string = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-    engine = create_engine(connection_string)
-    
-    # Execute the query and return the DataFrame
-    with engine.connect() as connection:
-        df = pd.read_sql(text(query), connection)
-    return df
-
-# Now calling the function will use the cache if available and not expired
-df = dataset()
-
+    return ownership_sync.load()
 
+# Datasets are fetched on first use through wofofiles.datasets, nothing is queried at import
 
 
+@register_dataset('transactions', metadata=transactions_metadata)
 def daily_transactions():
+    return transactions_of(transactions_version())
 
-    # Import the data
-    df = pd.read_excel('draft/data_sample.xlsx')
-    df.drop(['TRNS_TYPE_CODE', 'TRNS_SERIAL', 'ITEM_NAME'], axis=1, inplace=True)
-    df['CUSTOMER_NAME'].fillna('Walk-in', inplace=True)
-    df['LIST_RATE'].fillna(0, inplace=True) 
-
-    # rename columns
-    df.rename(columns={
-        'INVOICE_NO': 'TransactionNumber',
-        'INVOICE_DATE': 'TransactionDate',
-        'INVOICE_TIME': 'TransactionTime',
-        'INSERT_USER': 'UserCode',
-        'USER_NAME': 'UserName',
-        'STORE_CODE': 'StoreCode',
-        'STORE_NAME': 'StoreName',
-        'CUSTOMER_CODE': 'CustomerCode',
-        'CUSTOMER_NAME': 'CustomerName',
-        'ITEM_GROUP_CODE': 'GroupCode',
-        'GROUP_NAME': 'GroupName',
-        'ITEM_CODE': 'ItemCode',
-        'ITEM_NAME_E': 'ItemNameEn',
-        'SALES_PRICE': 'SalesPrice',
-        'DISC1_VALUE': 'DiscountValue',
-        'SALES_QTY': 'SalesQuantity',
-        'RETURN_QTY': 'ReturnQuantity',
-        'LIST_RATE': 'ListRate',
-        'EXPIRY_DATE': 'ExpiryDate',
-        'THEMAR_CUST_MOBILE': 'CustomerMobile',
-        'UNIT_COST': 'UnitCost'
-    }, inplace=True)
-
-    return df
+# Read the transactions from the local columnar copy of the workbook, once per stored version
+# (the workbook is only parsed again when it changes, see wofofiles/store.py), only the latest version is kept
+@ttl_cache(ttl=24 * 3600, maxsize=1)
+def transactions_of(version):
+    return read_transactions()
 
 
+# Cached for 1 hour, shared by every report that uses it
+@register_dataset('returns', metadata=transactions_metadata)
+@ttl_cache(ttl=3600)
 def returns_report():
-    # copy of daily transactions dataframe
-    df = daily_transactions()
-    # convert TransactionDate to datetime
-    df['TransactionDate'] = pd.to_datetime(df['TransactionDate'], format='%d-%m-%Y', dayfirst=True)
-    # drop unnecessary columns
-    df.drop(['UserCode', 'StoreCode', 'CustomerCode', 'GroupCode', 'ItemCode', 'CustomerMobile', 'UnitCost'], axis=1, inplace=True)
-
-    return df
-
+    # only the columns the returns report needs, TransactionDate is already a datetime
+    return read_transactions(columns=[
+        'TransactionNumber', 'TransactionDate', 'TransactionTime', 'UserName', 'StoreName',
+        'CustomerName', 'GroupName', 'ItemNameEn', 'SalesPrice', 'DiscountValue',
+        'SalesQuantity', 'ReturnQuantity', 'ListRate', 'ExpiryDate'
+    ])
+
+
+# Returns transactions indexed by store and date (see wofofiles/index.py), cached for 1 hour
+@register_dataset('returns_index', metadata=transactions_metadata)
+@ttl_cache(ttl=3600)
+def returns_index():
+    return StoreDateIndex(returns_report())
+
+
+# Returns aggregated by store, day and dimension (see wofofiles/cube.py), each part indexed by store and day
+# cached for the cache time of the returns report in the catalog
+@register_dataset('returns_cube', metadata=transactions_metadata)
+@ttl_cache(ttl=report_cache_ttl('R_S00001'))
+def returns_cube():
+    return index_cube(read_returns_cube())
@@ -0,0 +1,96 @@
+# Python libraries
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+# Local imports
+from wofofiles import conn
+
+
+# Pool that records how long callers wait for a connection and how often it overflows
+class MeteredQueuePool(QueuePool):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_hits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        overflow_before = self.overflow()
+        record = super()._do_get()
+        waited = time.perf_counter() - start
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+            if self.overflow() > overflow_before and self.overflow() > 0:
+                self.overflow_hits += 1
+        return record
+
+    # The engine disposes the pool by recreating it, keep the counters going
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkouts = self.checkouts
+        pool.overflow_hits = self.overflow_hits
+        pool.wait_time_total = self.wait_time_total
+        pool.wait_time_max = self.wait_time_max
+        return pool
+
+
+# One engine per process, shared by every page
+_engine = None
+_engine_lock = threading.Lock()
+
+# Create the connection string for the MySQL database
+def get_connection_string():
+    return f"mysql+pymysql://{conn.username}:{conn.password}@{conn.host}:{conn.port}/{conn.database}"
+
+# Function to get the shared SQLAlchemy engine (created on first use)
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    get_connection_string(),
+                    poolclass=MeteredQueuePool,
+                    pool_size=conn.pool_size,
+                    max_overflow=conn.max_overflow,
+                    pool_timeout=conn.pool_timeout,
+                    pool_recycle=conn.pool_recycle,
+                    pool_pre_ping=conn.pool_pre_ping,
+                    echo=conn.echo,
+                )
+    return _engine
+
+# Function to report the shared pool usage
+def pool_metrics():
+    if _engine is None:
+        return {
+            'pool_size': conn.pool_size,
+            'checked_out': 0,
+            'checked_in': 0,
+            'overflow': 0,
+            'checkouts': 0,
+            'overflow_hits': 0,
+            'wait_time_avg': 0.0,
+            'wait_time_max': 0.0,
+        }
+    pool = _engine.pool
+    with pool._metrics_lock:
+        checkouts = pool.checkouts
+        return {
+            'pool_size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'checkouts': checkouts,
+            'overflow_hits': pool.overflow_hits,
+            'wait_time_avg': pool.wait_time_total / checkouts if checkouts else 0.0,
+            'wait_time_max': pool.wait_time_max,
+        }
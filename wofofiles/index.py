@@ -0,0 +1,55 @@
+# Python libraries
+import numpy as np
+import pandas as pd
+
+
+# Index of a frame partitioned by store and sorted by date
+# each store is a contiguous block of rows, so a store/date-range slice is two binary searches
+# and an iloc range (no boolean mask over the whole frame)
+class StoreDateIndex:
+
+    def __init__(self, df, store_column='StoreName', date_column='TransactionDate'):
+        self.store_column = store_column
+        self.date_column = date_column
+        if not self._is_partitioned(df):
+            df = df.sort_values([store_column, date_column], kind='stable', ignore_index=True)
+        self.df = df
+        self.dates = df[date_column].to_numpy()
+        codes, stores = pd.factorize(df[store_column])
+        starts = np.flatnonzero(np.diff(codes)) + 1 if len(codes) else np.array([], dtype=int)
+        bounds = np.concatenate([[0], starts, [len(df)]]) if len(codes) else np.array([0])
+        self.offsets = {store: (int(bounds[i]), int(bounds[i + 1])) for i, store in enumerate(stores)}
+
+    # Check that every store is one block and the dates are sorted inside it
+    def _is_partitioned(self, df):
+        if df.empty:
+            return True
+        codes, stores = pd.factorize(df[self.store_column])
+        changes = np.diff(codes) != 0
+        if changes.sum() + 1 != len(stores):
+            return False
+        dates = df[self.date_column].to_numpy()
+        return bool(np.all((dates[1:] >= dates[:-1]) | changes))
+
+    def _date(self, value):
+        return pd.Timestamp(value).to_datetime64().astype(self.dates.dtype)
+
+    def stores(self):
+        return list(self.offsets)
+
+    # Row positions of one store between two dates (both inclusive, None for open ends)
+    def positions(self, store, start=None, end=None):
+        first, last = self.offsets.get(store, (0, 0))
+        dates = self.dates[first:last]
+        low = np.searchsorted(dates, self._date(start), side='left') if start is not None else 0
+        high = np.searchsorted(dates, self._date(end), side='right') if end is not None else len(dates)
+        return first + int(low), first + int(high)
+
+    # Rows of one store between two dates, as an iloc range of the indexed frame
+    def slice(self, store, start=None, end=None, columns=None):
+        low, high = self.positions(store, start, end)
+        df = self.df if columns is None else self.df[columns]
+        return df.iloc[low:high]
+
+    def __len__(self):
+        return len(self.df)
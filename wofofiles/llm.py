@@ -0,0 +1,107 @@
+# Python libraries
+import re
+import threading
+
+# Local imports
+from wofofiles.cache import TTLCache
+
+
+# Chat model backends: the pages talk to a backend instead of the OpenAI client,
+# so the chat features can run against a local stub
+# complete() returns the whole answer, stream() yields it piece by piece as it is generated
+
+
+# Backend calling the OpenAI chat completions API
+class OpenAIBackend:
+
+    def __init__(self, client, model="gpt-4o"):
+        self.client = client
+        self.model = model
+
+    def complete(self, messages, max_tokens=150):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content.strip()
+
+    def stream(self, messages, max_tokens=150):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+# OpenAI backends by model, built on first use and shared by every session
+_openai_backends = {}
+_openai_lock = threading.Lock()
+
+# Function to get the OpenAI backend of a model (the openai package is only imported here)
+def openai_backend(api_key, model="gpt-4o"):
+    backend = _openai_backends.get(model)
+    if backend is None:
+        with _openai_lock:
+            backend = _openai_backends.get(model)
+            if backend is None:
+                import openai
+                backend = _openai_backends[model] = OpenAIBackend(openai.OpenAI(api_key=api_key), model=model)
+    return backend
+
+
+# Local backend answering from a list of canned replies or a function of the messages
+# (for trying the chat pages and the query plans without an API key)
+class StubBackend:
+
+    def __init__(self, replies=None, model="stub"):
+        self.replies = replies if replies is not None else ["This is a stub answer."]
+        self.model = model
+        self.calls = []
+
+    def complete(self, messages, max_tokens=150):
+        self.calls.append(messages)
+        if callable(self.replies):
+            return self.replies(messages)
+        return self.replies[min(len(self.calls), len(self.replies)) - 1]
+
+    def stream(self, messages, max_tokens=150):
+        for word in re.findall(r"\S+\s*", self.complete(messages, max_tokens)):
+            yield word
+
+
+# Function to normalize a question for the response cache (case, spacing and trailing punctuation)
+def normalize_query(query):
+    return re.sub(r"\s+", " ", query).strip().rstrip("?!. ").lower()
+
+
+# Answers already given, per normalized question, model, data version and answer mode
+# LRU by count and expiring after ttl seconds, so a new data version or an old answer is never served
+class ResponseCache:
+
+    def __init__(self, ttl=3600, maxsize=256):
+        self.cache = TTLCache(ttl, maxsize=maxsize)
+
+    def key(self, query, model, version, mode=""):
+        return (normalize_query(query), model, version, mode)
+
+    def get(self, key):
+        status, value = self.cache.get(key)
+        return value if status is not None else None
+
+    def set(self, key, value):
+        self.cache.set(key, value)
+
+    def stats(self):
+        stats = self.cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# Shared by every session of the process
+response_cache = ResponseCache()
@@ -0,0 +1,62 @@
+# Python libraries
+import hashlib
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+try:
+    import fcntl
+except ImportError:
+    # no file locks on this platform, loads are only coalesced within the process
+    fcntl = None
+
+
+# Directory for the lock files shared by the server processes
+lock_dir = './cache/locks'
+
+# Locks of the flights in progress: name -> [lock, callers], dropped when the last caller leaves
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+# Function to build the lock file path of a name
+def lock_path(name):
+    digest = hashlib.sha1(repr(name).encode()).hexdigest()
+    return os.path.join(lock_dir, f"{digest}.lock")
+
+# Exclusive lock on a file in ./cache/locks, held by one process at a time
+@contextmanager
+def file_lock(name):
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(lock_path(name), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+# Exclusive lock per name between the threads of this process
+@contextmanager
+def thread_lock(name):
+    with _flights_lock:
+        flight = _flights.setdefault(name, [threading.Lock(), 0])
+        flight[1] += 1
+    try:
+        with flight[0]:
+            yield
+    finally:
+        with _flights_lock:
+            flight[1] -= 1
+            if flight[1] == 0:
+                del _flights[name]
+
+# Only one caller per name runs the block at a time, the others wait for it
+# (then they should look for its result before loading again)
+# across_processes: also lock a file so other server processes sharing ./cache wait too
+@contextmanager
+def single_flight(name, across_processes=False):
+    with thread_lock(name):
+        with file_lock(name) if across_processes else nullcontext():
+            yield
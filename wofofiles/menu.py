@@ -1,16 +1,11 @@
 import streamlit as st
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.exc import SQLAlchemyError
 
 
-# import the database connection
-from wofofiles.conn import username, password, host, port, database
+# import the permission snapshots
+from wofofiles.permissions import get_permissions
 
 
-# Create a connection string for the MySQL database
-connection_string = f"mysql+pymysql://{username}:{password}@{host}:{port}/{database}"
-engine = create_engine(connection_string, echo=True)
-
 def app_menu():
     with st.sidebar:
         with st.expander("☰ Navigator", expanded=False):
@@ -28,17 +23,9 @@ def app_menu():
             # Check if the user is logged in
             if st.session_state.get('logged_in'):
                 try:
-                    with engine.connect() as connection:
-                        user_group_query = text("""
-                            SELECT g.GroupName 
-                            FROM users u
-                            JOIN access_control ac ON u.UserCode = ac.UserCode
-                            JOIN `groups` g ON ac.GroupCode = g.GroupCode
-                            WHERE u.UserCode = :user_code
-                        """)
-                        result = connection.execute(user_group_query, {'user_code': st.session_state.get('user_code')}).fetchone()
-                        user_group = result.GroupName if result else None
-                        st.session_state['user_group'] = user_group
+                    # cached permission snapshot, no query on most reruns
+                    permissions = get_permissions(st.session_state.get('user_code'))
+                    st.session_state['user_group'] = permissions['group']
                 except SQLAlchemyError as e:
                     st.error(f"Failed to retrieve user group: {str(e.__dict__['orig'])}")
                     return
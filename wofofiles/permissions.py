@@ -0,0 +1,126 @@
+# Python libraries
+import os
+from contextlib import contextmanager
+from sqlalchemy import text
+
+# Local imports
+from wofofiles.cache import cache_dir, ttl_cache
+from wofofiles.engine import get_engine
+
+
+# Touched on every permission change so other processes drop their snapshots too
+version_path = os.path.join(cache_dir, 'permissions.version')
+
+
+# Function to get the current permissions version
+def permissions_version():
+    try:
+        return os.stat(version_path).st_mtime_ns
+    except OSError:
+        return 0
+
+# Rebuild effective_permissions from access_control: a user's own grants (with their group)
+# plus every grant of the groups the user belongs to
+# run inside the writing transaction so readers never see a half built table
+def rebuild_effective_permissions(connection):
+    connection.execute(text("DELETE FROM effective_permissions"))
+    connection.execute(text("""
+        INSERT INTO effective_permissions (UserCode, GroupName, SectionName, PageRef, PageName)
+        SELECT ac.UserCode, g.GroupName, s.SectionName, p.PageRef, p.PageName
+        FROM access_control ac
+        LEFT JOIN `groups` g ON ac.GroupCode = g.GroupCode
+        LEFT JOIN sections s ON ac.SectionCode = s.SectionCode
+        LEFT JOIN pages p ON ac.PageRef = p.PageRef
+        UNION
+        SELECT m.UserCode, NULL, s.SectionName, p.PageRef, p.PageName
+        FROM (
+            SELECT DISTINCT UserCode, GroupCode
+            FROM access_control
+            WHERE GroupCode IS NOT NULL
+        ) m
+        JOIN access_control ac ON ac.GroupCode = m.GroupCode
+        LEFT JOIN sections s ON ac.SectionCode = s.SectionCode
+        LEFT JOIN pages p ON ac.PageRef = p.PageRef
+    """))
+
+# Create effective_permissions if it is missing and fill it when empty (once per process)
+_table_ready = False
+
+def ensure_effective_permissions():
+    global _table_ready
+    if _table_ready:
+        return
+    with get_engine().begin() as connection:
+        connection.execute(text("""
+            CREATE TABLE IF NOT EXISTS effective_permissions (
+                UserCode int NOT NULL,
+                GroupName varchar(225) DEFAULT NULL,
+                SectionName varchar(225) DEFAULT NULL,
+                PageRef varchar(225) DEFAULT NULL,
+                PageName varchar(225) DEFAULT NULL,
+                KEY UserCode_PageRef (UserCode, PageRef)
+            )
+        """))
+        if connection.execute(text("SELECT 1 FROM effective_permissions LIMIT 1")).fetchone() is None:
+            rebuild_effective_permissions(connection)
+    _table_ready = True
+
+# Load everything a user can access with one indexed lookup on effective_permissions
+@ttl_cache(ttl=300, maxsize=1024)
+def load_permissions(user_code, version):
+    ensure_effective_permissions()
+    with get_engine().connect() as connection:
+        rows = connection.execute(text("""
+            SELECT GroupName, SectionName, PageRef, PageName
+            FROM effective_permissions
+            WHERE UserCode = :user_code
+        """), {'user_code': user_code}).fetchall()
+
+    groups = []
+    sections = []
+    pages = {}
+    for row in rows:
+        # only the user's own grants carry a group name
+        if row.GroupName and row.GroupName not in groups:
+            groups.append(row.GroupName)
+        if row.SectionName and row.SectionName not in sections:
+            sections.append(row.SectionName)
+        if row.PageRef:
+            pages[row.PageName] = row.PageRef
+    return {
+        'group': groups[0] if groups else None,
+        'groups': groups,
+        'sections': sections,
+        'pages': pages,
+    }
+
+# Function to get the effective permissions of a user (group, sections, pages: PageName -> PageRef)
+def get_permissions(user_code):
+    return load_permissions(user_code, permissions_version())
+
+# Drop every cached permission snapshot, in this process and (through the version file) in the others
+def invalidate_permissions():
+    load_permissions.invalidate()
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(version_path, 'a'):
+        os.utime(version_path)
+
+# Function to check one page permission with a point query on (UserCode, PageRef)
+def has_page_access(user_code, page_ref):
+    ensure_effective_permissions()
+    with get_engine().connect() as connection:
+        return connection.execute(text("""
+            SELECT 1 FROM effective_permissions
+            WHERE UserCode = :user_code AND PageRef = :page_ref
+            LIMIT 1
+        """), {'user_code': user_code, 'page_ref': page_ref}).fetchone() is not None
+
+# Transaction for writes to users, groups, sections, pages or access_control
+# effective_permissions is rebuilt in the same transaction and the snapshots are dropped once it is committed
+@contextmanager
+def permissions_write():
+    ensure_effective_permissions()
+    with get_engine().begin() as connection:
+        yield connection
+        rebuild_effective_permissions(connection)
+    invalidate_permissions()
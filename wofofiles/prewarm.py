@@ -0,0 +1,144 @@
+# Python libraries
+import threading
+import time
+import traceback
+
+# Local imports
+from wofofiles import conn
+from wofofiles.datasets import dataset_names, get_loader, shared_dataset
+from wofofiles.queries import use_sql
+from wofofiles.reports import report_catalog
+from wofofiles.store import ingest_transactions
+
+
+# Shortest interval between two refreshes of a task (seconds)
+min_interval = 30
+
+
+# A refresh job run by the scheduler, with its run history
+class PrewarmTask:
+
+    def __init__(self, name, refresh, interval):
+        self.name = name
+        self.refresh = refresh
+        self.interval = max(interval, min_interval)
+        self.next_run = 0
+        self.runs = 0
+        self.failures = 0
+        self.last_run = None
+        self.last_duration = None
+        self.last_error = None
+
+    def run(self):
+        start = time.perf_counter()
+        self.last_run = time.time()
+        try:
+            self.refresh()
+            self.last_error = None
+        except Exception:
+            self.failures += 1
+            self.last_error = traceback.format_exc(limit=3)
+        finally:
+            self.runs += 1
+            self.last_duration = time.perf_counter() - start
+            self.next_run = time.monotonic() + self.interval
+
+    def status(self):
+        return {
+            'interval': self.interval,
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_run': self.last_run,
+            'last_duration': self.last_duration,
+            'last_error': self.last_error,
+        }
+
+
+# Datasets kept warm: the ones reports declare (read from the workbook store) plus any already loaded in this process
+def warm_datasets():
+    names = set() if use_sql() else {name for report in report_catalog for name in report.datasets}
+    for name in dataset_names():
+        cache = getattr(get_loader(name), 'cache', None)
+        if cache is not None and cache.stats()['entries']:
+            names.add(name)
+    return sorted(names)
+
+# Function to get the refresh interval of a dataset: configured, or a share of its cache ttl
+def dataset_interval(name):
+    if name in conn.prewarm_intervals:
+        return conn.prewarm_intervals[name]
+    cache = getattr(get_loader(name), 'cache', None)
+    if cache is None:
+        return None
+    return cache.ttl * conn.prewarm_fraction
+
+
+# Refreshes the workbook store and the cached datasets on their interval, in one daemon thread
+# refreshes swap in the new version (see SharedDataset), so readers never wait for them
+class PrewarmScheduler:
+
+    def __init__(self):
+        self.tasks = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        if not use_sql():
+            self.add_task('store', ingest_transactions, conn.prewarm_intervals.get('store', 300))
+
+    def add_task(self, name, refresh, interval):
+        with self.lock:
+            if name not in self.tasks:
+                self.tasks[name] = PrewarmTask(name, refresh, interval)
+
+    # Pick up datasets loaded since the last pass
+    def add_datasets(self):
+        for name in warm_datasets():
+            interval = dataset_interval(name)
+            if interval is not None:
+                self.add_task(name, shared_dataset(name).refresh, interval)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name='prewarm', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            try:
+                self.add_datasets()
+            except Exception:
+                # the registry could not be read this pass, the known tasks still run
+                pass
+            with self.lock:
+                tasks = list(self.tasks.values())
+            # the store first, the datasets read from it
+            for task in tasks:
+                if time.monotonic() >= task.next_run and not self.stop_event.is_set():
+                    task.run()
+            next_run = min((task.next_run for task in tasks), default=time.monotonic() + min_interval)
+            self.stop_event.wait(max(1, min(next_run - time.monotonic(), min_interval)))
+
+    def status(self):
+        with self.lock:
+            return {name: task.status() for name, task in self.tasks.items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+# Function to start the process-wide scheduler (once per process)
+def start_prewarm():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PrewarmScheduler().start()
+    return _scheduler
+
+# Refresh duration and failures of every task, empty when the scheduler is not running
+def prewarm_status():
+    return _scheduler.status() if _scheduler is not None else {}
@@ -0,0 +1,90 @@
+# Python libraries
+from datetime import timedelta
+import pandas as pd
+from sqlalchemy import text
+
+# Local imports
+from wofofiles import conn
+from wofofiles.cache import ttl_cache
+from wofofiles.datasets import get_dataset, get_metadata
+from wofofiles.engine import get_engine
+from wofofiles.reports import report_cache_ttl
+from wofofiles.aggregate import measures
+
+
+# Columns the returns report can be grouped by (only these are ever put in the SQL text)
+returns_dimensions = ('StoreName', 'CustomerName', 'UserName', 'GroupName', 'ItemNameEn', 'TransactionDate')
+
+# Measures of the returns report
+returns_measures = measures
+
+
+# Function to check whether the transactions are read from MySQL
+def use_sql():
+    return conn.transactions_source == 'mysql'
+
+def check_dimension(dimension):
+    if dimension is not None and dimension not in returns_dimensions:
+        raise ValueError(f"Unknown returns dimension '{dimension}'")
+
+
+# Build the aggregated returns query for one store and date range, grouped by a dimension
+def returns_query(dimension=None):
+    check_dimension(dimension)
+    select = f"`{dimension}` AS `{dimension}`, " if dimension else ""
+    group_by = f"GROUP BY `{dimension}`" if dimension else ""
+    return text(f"""
+        SELECT {select}
+               SUM((SalesPrice - DiscountValue) * SalesQuantity) AS SalesValue,
+               SUM((SalesPrice - DiscountValue) * ReturnQuantity) AS ReturnValue,
+               SUM(SalesQuantity) AS SalesQuantity,
+               SUM(ReturnQuantity) AS ReturnQuantity
+        FROM `{conn.transactions_table}`
+        WHERE StoreName = :store
+        AND TransactionDate >= :start AND TransactionDate < :end
+        {group_by}
+    """)
+
+# Function to run the aggregated returns query, only the result rows come back
+# results are kept for the cache time of the returns report, on disk too so every server process reuses them
+@ttl_cache(ttl=report_cache_ttl('R_S00001'), maxsize=256, persist=True)
+def query_returns_summary(dimension, store, start, end):
+    params = {
+        'store': store,
+        'start': pd.Timestamp(start).to_pydatetime(),
+        # the end date is inclusive, compare against the start of the next day
+        'end': (pd.Timestamp(end).normalize() + timedelta(days=1)).to_pydatetime(),
+    }
+    with get_engine().connect() as connection:
+        df = pd.read_sql(returns_query(dimension), connection, params=params)
+    if dimension is None:
+        return df.fillna(0).set_axis(['Total'])
+    return df.set_index(dimension)[returns_measures]
+
+# Function to get the returns transactions of one store and date range (both inclusive) through the prebuilt index
+def query_returns(store, start=None, end=None, columns=None):
+    return get_dataset('returns_index').slice(store, start, end, columns=columns)
+
+
+# Store list and date bounds of the MySQL transactions, kept for the cache time of the returns report
+@ttl_cache(ttl=report_cache_ttl('R_S00001'))
+def query_returns_metadata():
+    with get_engine().connect() as connection:
+        bounds = connection.execute(text(f"""
+            SELECT MIN(TransactionDate) AS date_min, MAX(TransactionDate) AS date_max
+            FROM `{conn.transactions_table}`
+        """)).fetchone()
+        stores = connection.execute(text(f"""
+            SELECT DISTINCT StoreName FROM `{conn.transactions_table}`
+        """))
+        return {
+            'date_min': pd.Timestamp(bounds.date_min).to_pydatetime(),
+            'date_max': pd.Timestamp(bounds.date_max).to_pydatetime(),
+            'stores': [row[0] for row in stores],
+        }
+
+# Function to get the returns report filters' metadata from whichever source is active
+def returns_metadata():
+    if use_sql():
+        return query_returns_metadata()
+    return get_metadata('returns')
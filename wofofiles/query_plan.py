@@ -0,0 +1,195 @@
+# Python libraries
+import json
+import re
+import pandas as pd
+
+# Local imports
+from wofofiles.aggregate import measures, grouping_sets
+from wofofiles.datasets import shared_dataset
+from wofofiles.schema import category_columns
+
+
+# A chat question is answered in two calls: the model first writes a query plan (JSON) from the schema only,
+# the plan is validated and run here on the cached transactions, then the model answers from the result rows.
+# The plan can only filter, group, sum the report measures, sort and limit.
+
+# Columns a plan can group by (TransactionMonth is derived from TransactionDate)
+group_columns = category_columns + ['TransactionDate', 'TransactionMonth']
+
+# Columns a plan can filter on, and the operators allowed on them
+filter_columns = category_columns + ['TransactionDate', 'SalesPrice', 'DiscountValue', 'SalesQuantity', 'ReturnQuantity']
+text_operators = ('=', '!=', 'in', 'contains')
+value_operators = ('=', '!=', '>', '>=', '<', '<=')
+
+# Measures a plan can ask for (ReturnRate is ReturnValue / SalesValue in %)
+plan_measures = measures + ['ReturnRate']
+
+# Result rows sent back to the model, at most
+max_rows = 50
+
+
+class PlanError(ValueError):
+    pass
+
+
+# Schema part of the planning prompt (independent of the number of rows)
+def plan_prompt():
+    return f"""Write a JSON query plan answering the question over a sales transactions table, reply with the JSON only.
+Plan keys (all optional):
+"filters": list of {{"column", "op", "value"}}; columns {filter_columns};
+  ops {list(text_operators)} on names, {list(value_operators)} on dates (YYYY-MM-DD) and numbers; "in" takes a list
+"group_by": list of columns from {group_columns}
+"measures": list from {plan_measures} (sums over the rows of each group; default all)
+"sort": {{"by": a measure or group column, "descending": true|false}}
+"limit": number of result rows (at most {max_rows})
+SalesValue = (SalesPrice - DiscountValue) * SalesQuantity, ReturnValue likewise with ReturnQuantity.
+Example: {{"filters": [{{"column": "StoreName", "op": "=", "value": "Store 1"}}], "group_by": ["UserName"],
+"measures": ["ReturnValue", "ReturnRate"], "sort": {{"by": "ReturnValue", "descending": true}}, "limit": 5}}"""
+
+# Function to read the plan from the model reply (plain JSON or inside a code block)
+def parse_plan(reply):
+    match = re.search(r"\{.*\}", reply, re.DOTALL)
+    if match is None:
+        raise PlanError("The reply holds no JSON plan")
+    try:
+        return json.loads(match.group(0))
+    except ValueError as e:
+        raise PlanError(f"The plan is not valid JSON: {e}") from None
+
+# Function to parse the value of a date or number filter, PlanError when it is not one
+def parse_value(column, value):
+    if isinstance(value, bool):
+        raise PlanError(f"Invalid value for '{column}': {value}")
+    try:
+        if column == 'TransactionDate':
+            value = pd.Timestamp(value)
+            # the transactions have naive dates, an offset is converted to UTC and dropped
+            return value.tz_convert(None) if value.tzinfo is not None else value
+        return float(value)
+    except (TypeError, ValueError) as e:
+        raise PlanError(f"Invalid value for '{column}': {value!r} ({e})") from None
+
+# Function to read an optional list of names from the plan
+def plan_list(plan, key):
+    value = plan.get(key)
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise PlanError(f"'{key}' must be a list of names")
+    return list(value)
+
+# Function to check a plan against the whitelists, returns it with the defaults filled in
+# (date and number filter values parsed)
+def validate_plan(plan):
+    if not isinstance(plan, dict):
+        raise PlanError("The plan must be a JSON object")
+    unknown = set(plan) - {'filters', 'group_by', 'measures', 'sort', 'limit'}
+    if unknown:
+        raise PlanError(f"Unknown plan keys: {sorted(unknown)}")
+
+    filters = []
+    for item in plan.get('filters') or []:
+        if not isinstance(item, dict) or set(item) != {'column', 'op', 'value'}:
+            raise PlanError(f"Invalid filter: {item}")
+        column, op, value = item['column'], item['op'], item['value']
+        if column not in filter_columns:
+            raise PlanError(f"Cannot filter on '{column}'")
+        allowed = text_operators if column in category_columns else value_operators
+        if op not in allowed:
+            raise PlanError(f"Operator '{op}' is not allowed on '{column}'")
+        if op == 'in' and not isinstance(value, list):
+            raise PlanError(f"'in' needs a list of values for '{column}'")
+        if column not in category_columns:
+            value = parse_value(column, value)
+        filters.append({'column': column, 'op': op, 'value': value})
+
+    group_by = plan_list(plan, 'group_by')
+    for column in group_by:
+        if column not in group_columns:
+            raise PlanError(f"Cannot group by '{column}'")
+    if len(set(group_by)) != len(group_by):
+        raise PlanError(f"Duplicate group columns: {group_by}")
+
+    selected = plan_list(plan, 'measures') or list(plan_measures)
+    for measure in selected:
+        if measure not in plan_measures:
+            raise PlanError(f"Unknown measure '{measure}'")
+
+    sort = plan.get('sort')
+    if sort is not None:
+        if not isinstance(sort, dict) or sort.get('by') not in selected + group_by \
+                or not isinstance(sort.get('descending', True), bool):
+            raise PlanError(f"Invalid sort: {sort}")
+        sort = {'by': sort['by'], 'descending': sort.get('descending', True)}
+
+    limit = plan.get('limit')
+    if limit is None:
+        limit = max_rows
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+        raise PlanError(f"Invalid limit: {limit}")
+
+    return {'filters': filters, 'group_by': group_by, 'measures': selected,
+            'sort': sort, 'limit': min(limit, max_rows)}
+
+# Boolean mask of one filter
+def filter_mask(df, column, op, value):
+    series = df[column]
+    if column in category_columns:
+        names = series.cat.categories
+        if op == 'contains':
+            matched = names[names.str.lower().str.contains(str(value).lower(), regex=False)]
+        else:
+            matched = [str(name) for name in value] if op == 'in' else [str(value)]
+        mask = series.isin(matched)
+        return ~mask if op == '!=' else mask
+    # date and number values were parsed by validate_plan
+    return {
+        '=': series.eq, '!=': series.ne, '>': series.gt,
+        '>=': series.ge, '<': series.lt, '<=': series.le,
+    }[op](value)
+
+# Run a validated plan on the transactions, returns the result frame (at most plan['limit'] rows)
+def execute_plan(plan, df=None):
+    df = shared_dataset('transactions').get() if df is None else df
+    mask = pd.Series(True, index=df.index)
+    for item in plan['filters']:
+        mask &= filter_mask(df, item['column'], item['op'], item['value'])
+    rows = df[mask]
+
+    keys = rows[[column for column in plan['group_by'] if column in rows.columns]]
+    if 'TransactionMonth' in plan['group_by']:
+        keys = keys.assign(TransactionMonth=rows['TransactionDate'].dt.strftime('%Y-%m'))
+    result = grouping_sets(rows, {'result': plan['group_by']}, keys_df=keys)['result']
+    result['ReturnRate'] = (result['ReturnValue'] / result['SalesValue'].where(result['SalesValue'] != 0) * 100).round(1)
+    result = result[plan['measures']].round(2).reset_index()
+    if 'index' in result.columns:
+        result = result.drop(columns='index')
+
+    if plan['sort'] is not None:
+        result = result.sort_values(plan['sort']['by'], ascending=not plan['sort']['descending'])
+    return result.head(plan['limit'])
+
+# Ask the model for a plan of the question and run it, returns the validated plan and the result frame
+# backend: any object with complete(messages, max_tokens) (see wofofiles/llm.py)
+def run_plan(question, backend, df=None):
+    reply = backend.complete([
+        {"role": "system", "content": plan_prompt()},
+        {"role": "user", "content": question}
+    ], max_tokens=400)
+    plan = validate_plan(parse_plan(reply))
+    return plan, execute_plan(plan, df)
+
+# Messages asking the model to answer from the result of a plan
+def answer_messages(question, plan, result):
+    return [
+        {"role": "system", "content": "You are a helpful assistant. Answer from the query result only."},
+        {"role": "user", "content": f"Question: {question}\nQuery plan: {json.dumps(plan, default=str)}\n"
+                                    f"Result ({len(result)} rows):\n{result.to_csv(index=False)}"}
+    ]
+
+# Answer a question with a query plan: plan from the schema, run locally, answer from the result rows
+# returns the answer, the validated plan and the result frame
+def answer_with_plan(question, backend, df=None, max_tokens=150):
+    plan, result = run_plan(question, backend, df)
+    answer = backend.complete(answer_messages(question, plan, result), max_tokens=max_tokens)
+    return answer, plan, result
@@ -0,0 +1,78 @@
+# Python libraries
+import importlib
+import threading
+
+# Local imports
+from wofofiles.datasets import declare_datasets, prefetch
+
+
+# Module holding the reports of each department (pages/reports/<prefix>.py)
+department_modules = {
+    'Sales': 'pages.reports.R_S',
+}
+
+
+# One report: its page reference (also the function name in the department module),
+# department, title, the datasets it reads and how long they may be cached (seconds)
+class Report:
+
+    def __init__(self, page_ref, department, title, datasets=(), cache_ttl=3600):
+        self.page_ref = page_ref
+        self.department = department
+        self.title = title
+        self.datasets = tuple(datasets)
+        self.cache_ttl = cache_ttl
+
+    @property
+    def module(self):
+        return department_modules[self.department]
+
+    def __repr__(self):
+        return f"Report({self.page_ref!r}, {self.department!r})"
+
+
+# The report catalog, read without importing any department module
+report_catalog = [
+    Report('R_S00001', 'Sales', 'Returns Report', datasets=['returns_cube'], cache_ttl=600),
+    Report('R_S00002', 'Sales', 'Report 2 Overview'),
+]
+
+_reports = {report.page_ref: report for report in report_catalog}
+_functions = {}
+_import_lock = threading.Lock()
+
+
+def get_report(page_ref):
+    return _reports.get(page_ref)
+
+# Function to list the reports of a department
+def department_reports(department):
+    return [report for report in report_catalog if report.department == department]
+
+def departments():
+    return list(department_modules)
+
+# Seconds the data of a report may be cached, passed to the ttl_cache of its datasets and queries
+def report_cache_ttl(page_ref):
+    return _reports[page_ref].cache_ttl
+
+# Declare the datasets of a report (called by the department module), nothing is fetched yet
+def report_datasets(page_ref):
+    return declare_datasets(page_ref, *_reports[page_ref].datasets)
+
+# Function to get the function drawing a report, its department module is imported on first use
+def load_report(page_ref):
+    report = _reports.get(page_ref)
+    if report is None:
+        return None
+    function = _functions.get(page_ref)
+    if function is None:
+        with _import_lock:
+            module = importlib.import_module(report.module)
+            function = _functions[page_ref] = getattr(module, page_ref)
+    return function
+
+# Load the datasets of a report (e.g. to warm the cache before it is opened)
+def prefetch_report(page_ref):
+    load_report(page_ref)
+    prefetch(page_ref)
@@ -0,0 +1,164 @@
+# Python libraries
+import re
+import threading
+import zlib
+from collections import Counter
+import numpy as np
+
+# Local imports
+from wofofiles.aggregate import grouping_sets
+from wofofiles.datasets import shared_dataset
+from wofofiles.globfuncs import format_value
+from wofofiles.locks import single_flight
+
+
+# Entities that get a card, with the words a question uses for them
+card_dimensions = {
+    'StoreName': ('store', 'branch', 'pharmacy'),
+    'CustomerName': ('customer', 'client', 'insurance'),
+    'UserName': ('user', 'cashier', 'employee', 'pharmacist'),
+    'GroupName': ('group', 'category'),
+    'ItemNameEn': ('item', 'product', 'medicine'),
+}
+
+# Stores listed on a card, at most
+card_stores = 5
+
+# Number of hash buckets of the n-gram vectors
+buckets = 1 << 20
+
+# Lowest name similarity of a returned card, and the score added to the cards
+# of a dimension the question names ("which customer ...")
+min_score = 0.2
+dimension_boost = 0.1
+
+
+# Function to split a text into hashed features: its words and the character 3-grams of each word
+def features(text):
+    grams = Counter()
+    for word in re.findall(r"\w+", str(text).lower()):
+        grams[zlib.crc32(word.encode()) % buckets] += 1
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            grams[zlib.crc32(padded[i:i + 3].encode()) % buckets] += 1
+    return grams
+
+def _rate(returns, sales):
+    return f"{returns / sales * 100:.1f}%" if sales else "n/a"
+
+
+# Function to build the aggregate card of every store, customer, user, group and item:
+# (dimension, name) -> one line of totals with the return rate and the top stores of the entity
+def build_cards(df):
+    sets = {}
+    for column in card_dimensions:
+        sets[column] = [column]
+        if column != 'StoreName':
+            sets[(column, 'StoreName')] = [column, 'StoreName']
+    aggregates = grouping_sets(df, sets)
+
+    cards = {}
+    for column in card_dimensions:
+        # best selling stores of every name, in one pass
+        stores = {}
+        if column != 'StoreName':
+            by_store = aggregates[(column, 'StoreName')].sort_values('SalesValue', ascending=False)
+            by_store = by_store.groupby(level=0, observed=True, sort=False).head(card_stores)
+            for (name, store), row in zip(by_store.index, by_store.itertuples(index=False)):
+                stores.setdefault(name, []).append(
+                    f"{store} {format_value(row.SalesValue)}/{format_value(row.ReturnValue)} ({_rate(row.ReturnValue, row.SalesValue)})")
+
+        for name, row in zip(aggregates[column].index, aggregates[column].itertuples(index=False)):
+            text = (f"{column} {name}: sales {format_value(row.SalesValue)}, returns {format_value(row.ReturnValue)} "
+                    f"(return rate {_rate(row.ReturnValue, row.SalesValue)}), "
+                    f"quantity sold {format_value(row.SalesQuantity)}, returned {format_value(row.ReturnQuantity)}")
+            if name in stores:
+                text += "; by store (sales/returns): " + ", ".join(stores[name])
+            cards[(column, str(name))] = text
+    return cards
+
+
+# TF-IDF index over the entity names (hashed word and 3-gram features), pointing to the aggregate cards
+# on a new data version the cards and the postings are rebuilt in full (see retrieval_index);
+# only the name features are kept, so they are computed for new entities only
+class RetrievalIndex:
+
+    def __init__(self):
+        self.version = None
+        self.cards = {}
+        self.name_features = {}
+        self.document_frequency = Counter()
+        self.keys = []
+        self.postings = {}
+        self.lock = threading.Lock()
+
+    # Bring the index to a new data version
+    def update(self, version, cards):
+        with self.lock:
+            removed = self.name_features.keys() - cards.keys()
+            for key in removed:
+                self.document_frequency.subtract(self.name_features.pop(key).keys())
+            for key in cards.keys() - self.name_features.keys():
+                grams = features(key[1])
+                self.name_features[key] = grams
+                self.document_frequency.update(grams.keys())
+            self.document_frequency += Counter()  # drop the zero counts
+            self.cards = cards
+            self._build_postings()
+            self.version = version
+
+    def idf(self, feature):
+        return np.log((1 + len(self.keys)) / (1 + self.document_frequency.get(feature, 0))) + 1
+
+    # feature -> (card positions, normalized weights)
+    def _build_postings(self):
+        self.keys = list(self.cards)
+        lists = {}
+        for position, key in enumerate(self.keys):
+            grams = self.name_features[key]
+            weights = {feature: count * self.idf(feature) for feature, count in grams.items()}
+            norm = np.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            for feature, weight in weights.items():
+                lists.setdefault(feature, ([], []))
+                lists[feature][0].append(position)
+                lists[feature][1].append(weight / norm)
+        self.postings = {feature: (np.array(positions), np.array(weights))
+                         for feature, (positions, weights) in lists.items()}
+
+    # The cards of the entities closest to the question, best first: [(score, dimension, name, card)]
+    def search(self, question, k=8):
+        with self.lock:
+            if not self.keys:
+                return []
+            grams = features(question)
+            weights = {feature: count * self.idf(feature) for feature, count in grams.items() if feature in self.postings}
+            norm = np.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            scores = np.zeros(len(self.keys))
+            for feature, weight in weights.items():
+                positions, card_weights = self.postings[feature]
+                np.add.at(scores, positions, card_weights * weight / norm)
+
+            # the dimensions the question names ("store 21", "which customers") are boosted before the threshold,
+            # so a short name like a store number still passes it, and their cards come before the others
+            words = set(re.findall(r"\w+", question.lower()))
+            named = {column for column, names in card_dimensions.items()
+                     if any(word in words or word + 's' in words for word in names)}
+            in_named = np.array([column in named for column, _ in self.keys])
+            scores[in_named & (scores > 0)] += dimension_boost
+            scores[scores < min_score] = 0
+
+            best = np.lexsort((-scores, ~in_named))[:k]
+            return [(float(scores[i]), *self.keys[i], self.cards[self.keys[i]]) for i in best if scores[i] > 0]
+
+
+_index = RetrievalIndex()
+
+
+# Function to get the index of a data version, rebuilt when the version changes: every card is aggregated again
+# from all the transactions (once, other callers wait for that update)
+def retrieval_index(version):
+    if _index.version != version:
+        with single_flight(('retrieval', version)):
+            if _index.version != version:
+                _index.update(version, build_cards(shared_dataset('transactions').get()))
+    return _index
@@ -0,0 +1,43 @@
+# Python libraries
+import pandas as pd
+
+
+# Bump when the schema changes so stored copies are rebuilt
+schema_version = 3
+
+# Low-cardinality name columns stored as categoricals (one copy of each name plus small integer codes)
+category_columns = ['StoreName', 'CustomerName', 'UserName', 'GroupName', 'ItemNameEn']
+
+# Date columns of the transaction dataset
+date_columns = ['TransactionDate', 'ExpiryDate']
+
+# Numeric columns kept at full width (identifiers too large or too precise to downcast)
+wide_columns = ['TransactionNumber', 'StoreCode', 'CustomerCode', 'GroupCode', 'CustomerMobile']
+
+
+# Function to apply the compact transaction schema to a frame
+# names become categoricals, integers the smallest integer type that fits and floats float32
+# (money sums are done in float64 by the reports)
+def apply_schema(df):
+    df = df.copy()
+    for column in df.columns:
+        series = df[column]
+        if column in category_columns:
+            df[column] = series.astype('category')
+        elif column in date_columns or column in wide_columns:
+            continue
+        elif pd.api.types.is_integer_dtype(series):
+            df[column] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            df[column] = pd.to_numeric(series, downcast='float')
+    return df
+
+# Function to report the memory used by each column of a frame
+def memory_report(df):
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'bytes': usage,
+    })
+    report.loc['Total'] = ['', usage.sum()]
+    return report
@@ -0,0 +1,222 @@
+# Python libraries
+import hashlib
+from datetime import datetime
+import json
+import os
+import tempfile
+import time
+import pandas as pd
+import pyarrow.feather as feather
+
+# Local imports
+from wofofiles.locks import single_flight
+from wofofiles.schema import apply_schema, memory_report, schema_version
+from wofofiles.cube import build_cube, changed_days, day_digests, update_cube
+
+
+# Source workbook and the local columnar copy of it
+source_path = 'draft/data_sample.xlsx'
+store_dir = './cache/store'
+transactions_path = os.path.join(store_dir, 'transactions.feather')
+meta_path = os.path.join(store_dir, 'transactions.json')
+cube_dir = os.path.join(store_dir, 'cube')
+
+# Workbook columns renamed to the transaction schema
+column_names = {
+    'INVOICE_NO': 'TransactionNumber',
+    'INVOICE_DATE': 'TransactionDate',
+    'INVOICE_TIME': 'TransactionTime',
+    'INSERT_USER': 'UserCode',
+    'USER_NAME': 'UserName',
+    'STORE_CODE': 'StoreCode',
+    'STORE_NAME': 'StoreName',
+    'CUSTOMER_CODE': 'CustomerCode',
+    'CUSTOMER_NAME': 'CustomerName',
+    'ITEM_GROUP_CODE': 'GroupCode',
+    'GROUP_NAME': 'GroupName',
+    'ITEM_CODE': 'ItemCode',
+    'ITEM_NAME_E': 'ItemNameEn',
+    'SALES_PRICE': 'SalesPrice',
+    'DISC1_VALUE': 'DiscountValue',
+    'SALES_QTY': 'SalesQuantity',
+    'RETURN_QTY': 'ReturnQuantity',
+    'LIST_RATE': 'ListRate',
+    'EXPIRY_DATE': 'ExpiryDate',
+    'THEMAR_CUST_MOBILE': 'CustomerMobile',
+    'UNIT_COST': 'UnitCost'
+}
+
+# Function to hash the source file
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def read_meta():
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Function to write a file through a unique temporary file next to it, moved into place once complete
+# (processes writing the same file never share a temporary file, readers see the old or the new file)
+def write_atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_meta(meta):
+    def write(path):
+        with open(path, 'w') as f:
+            json.dump(meta, f)
+    write_atomic(meta_path, write)
+
+# Function to check the stored copy against the source (mtime and size first, the hash only when they differ)
+def is_current(meta):
+    if not meta or not os.path.exists(transactions_path) or meta.get('schema') != schema_version:
+        return False
+    stat = os.stat(source_path)
+    if meta.get('mtime') == stat.st_mtime and meta.get('size') == stat.st_size:
+        return True
+    if meta.get('sha256') == file_hash(source_path):
+        # touched but unchanged, remember the new mtime
+        meta.update(mtime=stat.st_mtime, size=stat.st_size)
+        write_meta(meta)
+        return True
+    return False
+
+# Function to read and clean the workbook into the transaction schema
+def read_source():
+    df = pd.read_excel(source_path)
+    df = df.drop(['TRNS_TYPE_CODE', 'TRNS_SERIAL', 'ITEM_NAME'], axis=1)
+    df['CUSTOMER_NAME'] = df['CUSTOMER_NAME'].fillna('Walk-in')
+    df['LIST_RATE'] = df['LIST_RATE'].fillna(0)
+    df = df.rename(columns=column_names)
+
+    # parse the dates once here instead of in every report
+    df['TransactionDate'] = pd.to_datetime(df['TransactionDate'], format='%d-%m-%Y')
+    df['ExpiryDate'] = pd.to_datetime(df['ExpiryDate'], format='%d-%m-%Y', errors='coerce')
+
+    # stored partitioned by store and sorted by date, so StoreDateIndex needs no sort when loading
+    df = df.sort_values(['StoreName', 'TransactionDate'], kind='stable', ignore_index=True)
+    return apply_schema(df)
+
+# Convert the workbook into the columnar store (uncompressed Feather so it can be memory-mapped)
+# one ingest at a time across the server processes, the others wait and find the store current
+def ingest_transactions(force=False):
+    if not force:
+        meta = read_meta()
+        if is_current(meta):
+            return meta
+    with single_flight(('ingest', source_path), across_processes=True):
+        meta = read_meta()
+        if not force and is_current(meta):
+            return meta
+
+        stat = os.stat(source_path)
+        sha256 = file_hash(source_path)
+        df = read_source()
+
+        os.makedirs(store_dir, exist_ok=True)
+        write_atomic(transactions_path, lambda path: feather.write_feather(df, path, compression='uncompressed'))
+
+        # aggregate the days whose rows changed into the returns cube
+        # (everything on a schema change, a forced ingest or without the day checksums of the last ingest)
+        digests = day_digests(df)
+        previous = read_cube() if not force and meta.get('schema') == schema_version and 'days' in meta else None
+        if previous is None:
+            write_cube(build_cube(df))
+        else:
+            write_cube(update_cube(previous, df, changed_days(meta['days'], digests)))
+        meta = {
+            'source': source_path,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'sha256': sha256,
+            'schema': schema_version,
+            'rows': len(df),
+            'memory_bytes': int(memory_report(df).loc['Total', 'bytes']),
+            # precomputed for the report filters so reruns do not scan the frame
+            'date_min': df['TransactionDate'].min().isoformat(),
+            'date_max': df['TransactionDate'].max().isoformat(),
+            'stores': [str(store) for store in df['StoreName'].unique()],
+            # row count and checksum per day, to find the days to aggregate again on the next ingest
+            'days': digests,
+            'ingested_at': time.time(),
+        }
+        write_meta(meta)
+        return meta
+
+def write_cube(cube):
+    os.makedirs(cube_dir, exist_ok=True)
+    for name, part in cube.items():
+        write_atomic(os.path.join(cube_dir, f"{name}.feather"),
+                     lambda path: feather.write_feather(part, path, compression='uncompressed'))
+
+# Read the stored returns cube, None when it was never built
+def read_cube():
+    if not os.path.isdir(cube_dir):
+        return None
+    cube = {}
+    for file in os.listdir(cube_dir):
+        if file.endswith('.feather'):
+            table = feather.read_table(os.path.join(cube_dir, file), memory_map=True)
+            cube[file[:-len('.feather')]] = table.to_pandas(split_blocks=True)
+    return cube or None
+
+# Parsed copy of the metadata file, kept until the file changes: (mtime, meta, transactions metadata)
+_stored = (None, None, None)
+
+# Function to get the metadata of the stored copy without looking at the source,
+# so readers never take the ingest lock or wait for an ingest in progress (they see the previous copy until it is replaced)
+# the store is only built here when it does not exist yet or has an old schema;
+# a changed workbook is picked up by ingest_transactions, run by the prewarm 'store' task or an explicit refresh
+def stored_meta():
+    global _stored
+    try:
+        mtime = os.stat(meta_path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime is None or mtime != _stored[0]:
+        meta = read_meta() if mtime is not None else {}
+        if meta.get('schema') != schema_version or not os.path.exists(transactions_path):
+            meta = ingest_transactions()
+            mtime = os.stat(meta_path).st_mtime_ns
+        metadata = {
+            'version': meta['sha256'],
+            'rows': meta['rows'],
+            'date_min': datetime.fromisoformat(meta['date_min']),
+            'date_max': datetime.fromisoformat(meta['date_max']),
+            'stores': meta['stores'],
+        }
+        _stored = (mtime, meta, metadata)
+    return _stored[1]
+
+# Function to read the returns cube of the stored copy
+def read_returns_cube():
+    stored_meta()
+    return read_cube()
+
+# Function to read the transactions of the stored copy
+def read_transactions(columns=None):
+    stored_meta()
+    table = feather.read_table(transactions_path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+# Version of the stored data (changes whenever the source is re-ingested)
+def transactions_version():
+    return stored_meta()['sha256']
+
+# Metadata of the stored transactions: date bounds and store list (parsed once per ingest)
+def transactions_metadata():
+    stored_meta()
+    return dict(_stored[2])
@@ -0,0 +1,130 @@
+# Python libraries
+import json
+import os
+import threading
+import time
+import pandas as pd
+from sqlalchemy import inspect, text
+
+# Local imports
+from wofofiles.engine import get_engine
+from wofofiles.locks import file_lock
+
+
+# Directory for the local table snapshots
+snapshot_dir = './cache/snapshots'
+
+
+# Keeps a local snapshot of a table and only fetches the rows changed since the last sync
+# table: table to mirror
+# watermark_column: last-modified column; rows with a value >= the stored watermark are re-fetched
+# key_columns: columns identifying a row, defaults to the table's primary key
+# full_reload_every: seconds between full reloads (picks up deleted rows)
+# fresh_for: a snapshot synced less than this many seconds ago (e.g. by another server process) is used as is
+# Without a watermark column the primary key is used as a high-water mark (new rows only),
+# without either every sync is a full reload.
+class TableSync:
+
+    def __init__(self, table, watermark_column=None, key_columns=None, full_reload_every=24 * 3600, fresh_for=60):
+        self.table = table
+        self.watermark_column = watermark_column
+        self.key_columns = list(key_columns) if key_columns else None
+        self.full_reload_every = full_reload_every
+        self.fresh_for = fresh_for
+        self.lock = threading.Lock()
+        self.snapshot_path = os.path.join(snapshot_dir, f"{table}.pkl")
+        self.meta_path = os.path.join(snapshot_dir, f"{table}.json")
+
+    # Function to get the up to date table, incrementally when possible
+    # one sync at a time across threads and server processes, the others then read its snapshot
+    def load(self):
+        with self.lock, file_lock(('sync', self.table)):
+            snapshot, meta = self._read_snapshot()
+            if snapshot is not None and time.time() - meta.get('synced_at', 0) < self.fresh_for:
+                return snapshot
+            if snapshot is None or time.time() - meta.get('full_at', 0) > self.full_reload_every:
+                return self._full_reload()
+            try:
+                return self._incremental(snapshot, meta)
+            except Exception:
+                # the snapshot or the table changed shape, start over
+                return self._full_reload()
+
+    # Function to reload the whole table and replace the snapshot
+    def full_reload(self):
+        with self.lock, file_lock(('sync', self.table)):
+            return self._full_reload()
+
+    def _keys(self):
+        if self.key_columns is None:
+            pk = inspect(get_engine()).get_pk_constraint(self.table)
+            self.key_columns = pk.get('constrained_columns') or []
+        return self.key_columns
+
+    # The column used as high-water mark and how it is compared
+    def _watermark(self):
+        if self.watermark_column:
+            return self.watermark_column, '>='
+        keys = self._keys()
+        if len(keys) == 1:
+            return keys[0], '>'
+        return None, None
+
+    def _full_reload(self):
+        with get_engine().connect() as connection:
+            df = pd.read_sql(text(f"SELECT * FROM `{self.table}`"), connection)
+        self._write_snapshot(df, full=True)
+        return df
+
+    def _incremental(self, snapshot, meta):
+        column, op = self._watermark()
+        keys = self._keys()
+        if column is None or not keys or meta.get('watermark') is None:
+            return self._full_reload()
+
+        query = text(f"SELECT * FROM `{self.table}` WHERE `{column}` {op} :watermark")
+        with get_engine().connect() as connection:
+            changes = pd.read_sql(query, connection, params={'watermark': meta['watermark']})
+        if changes.empty:
+            return snapshot
+
+        # updated rows replace their old version, new rows are appended
+        df = pd.concat([snapshot, changes], ignore_index=True)
+        df = df.drop_duplicates(subset=keys, keep='last').reset_index(drop=True)
+        self._write_snapshot(df, full=False, previous=meta)
+        return df
+
+    def _read_snapshot(self):
+        if not (os.path.exists(self.snapshot_path) and os.path.exists(self.meta_path)):
+            return None, {}
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            return pd.read_pickle(self.snapshot_path), meta
+        except (OSError, ValueError, EOFError):
+            return None, {}
+
+    def _write_snapshot(self, df, full, previous=None):
+        column, _ = self._watermark()
+        watermark = None
+        if column and column in df.columns and not df.empty:
+            watermark = df[column].max()
+            # store as plain JSON (timestamps as ISO strings, numpy numbers as Python numbers)
+            if hasattr(watermark, 'isoformat'):
+                watermark = watermark.isoformat()
+            elif hasattr(watermark, 'item'):
+                watermark = watermark.item()
+        meta = {
+            'table': self.table,
+            'watermark': watermark,
+            'full_at': time.time() if full else previous.get('full_at', 0),
+            'synced_at': time.time(),
+            'rows': len(df),
+        }
+        # write to temporary files first so readers never see a half written snapshot
+        os.makedirs(snapshot_dir, exist_ok=True)
+        df.to_pickle(self.snapshot_path + '.tmp')
+        with open(self.meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(self.snapshot_path + '.tmp', self.snapshot_path)
+        os.replace(self.meta_path + '.tmp', self.meta_path)